@@ -1,50 +1,121 @@
 'use strict';
 
-angular.module('redmineGamification.service', []).service('gamificationService', function ($http) {
-    var parseData = function (data) {
+angular.module('redmineGamification.service', []).service('gamificationService', function ($http, $q) {
+    /**
+     * Maps the reason flags of a day to their texts with the reasons table
+     * of the data, older data files come with lists of texts already
+     */
+    var reasonTexts = function (dayPoints, reasons) {
+        var result = {};
 
-        var result = [];
+        var flags = Object.keys(reasons || {}).map(Number).sort(function (a, b) {
+            return a - b;
+        });
 
-        for (var userId in data["user_names"]) {
-            var row = {
-                "name": data["user_names"][userId],
-                "days": {}
+        for (var pointingType in dayPoints) {
+            var point = dayPoints[pointingType];
+
+            result[pointingType] = {
+                "reasons": point.reasons instanceof Array ? point.reasons : flags.filter(function (flag) {
+                    return (point.reasons & flag) !== 0;
+                }).map(function (flag) {
+                    return reasons[flag];
+                }),
+                "sum": point.sum
             };
+        }
+
+        return result;
+    };
+
+    var addDays = function (row, points, sumUp, reasons) {
 
-            for (var day in data["points"][userId]) {
-                row["days"][day] = {}
-                for (var pointingType in data["points"][userId][day]) {
-                    var point = data["points"][userId][day][pointingType];
+        for (var day in points) {
+            row["days"][day] = {}
+            for (var pointingType in points[day]) {
+                var point = points[day][pointingType];
 
-                    var value = Math.round(point.sum * 100);
+                var value = Math.round(point.sum * 100);
 
+                if (sumUp) {
                     row[pointingType] = (row[pointingType] || 0) + Math.max(0.0, value);
-                    row["days"][day][pointingType] = value;
                 }
+                row["days"][day][pointingType] = value;
             }
+        }
 
-            var today = new Date();
-            today.setDate(today.getDate());
-            var isoString = today.toISOString().slice(0, 10);
-
-            if (row["days"][isoString] !== undefined) {
-                row["today"] = {
-                    "day": isoString,
-                    "points": row["days"][isoString],
-                    "reasons": data["points"][userId][isoString]
-                };
-            }
+        var today = new Date();
+        today.setDate(today.getDate());
+        var isoString = today.toISOString().slice(0, 10);
 
-            result.push(row);
+        if (points[isoString] !== undefined) {
+            row["today"] = {
+                "day": isoString,
+                "points": row["days"][isoString],
+                "reasons": reasonTexts(points[isoString], reasons)
+            };
         }
+    };
 
+    var sortRows = function (result) {
         result.sort(function (a, b) {
+            if (a.rank !== undefined && b.rank !== undefined) {
+                return a.rank - b.rank;
+            }
+
             return b.update_points + b.time_points - a.update_points - a.time_points;
         });
 
         return result;
     };
 
+    /**
+     * Takes over the aggregates runner.py precomputed for the user, the "today"
+     * entry only if it was computed for the current day
+     */
+    var addSummary = function (row, summary, reasons) {
+        row["time_points"] = summary["time_points"] || 0;
+        row["update_points"] = summary["update_points"] || 0;
+        row["rank"] = summary["rank"];
+        row["last_7_days"] = summary["last_7_days"];
+        row["last_30_days"] = summary["last_30_days"];
+
+        var isoString = new Date().toISOString().slice(0, 10);
+
+        if (summary["today"] !== undefined && summary["today"]["day"] === isoString) {
+            row["today"] = {
+                "day": summary["today"]["day"],
+                "points": summary["today"]["points"],
+                "reasons": reasonTexts(summary["today"]["reasons"], reasons)
+            };
+        }
+    };
+
+    var parseData = function (data) {
+
+        var result = [];
+
+        for (var userId in data["user_names"]) {
+            var row = {
+                "name": data["user_names"][userId],
+                "days": {}
+            };
+
+            // Older data files come without the summary, the totals are computed here then
+            var summary = (data["summary"] || {})[userId];
+
+            addDays(row, data["points"][userId], summary === undefined, data["reasons"]);
+
+            if (summary !== undefined) {
+                addSummary(row, summary, data["reasons"]);
+            }
+
+            result.push(row);
+        }
+
+        return sortRows(result);
+    };
+
     var getData = function (url) {
         url = url || "data/data.json";
 
@@ -53,8 +124,161 @@ angular.module('redmineGamification.service', []).service('gamificationService',
         });
     };
 
+    /**
+     * Decodes the binary file written by runner.py --binary into the
+     * same data getData reads from JSON, see exporter.write_binary
+     */
+    var decodeBinary = function (buffer) {
+        var bytes = new Uint8Array(buffer);
+        var magic = String.fromCharCode(bytes[0], bytes[1], bytes[2], bytes[3]);
+
+        if (magic !== "RGB2") {
+            throw new Error("Not a binary points file");
+        }
+
+        var headerLength = new DataView(buffer).getUint32(4, true);
+        var header = JSON.parse(new TextDecoder("utf-8").decode(bytes.subarray(8, 8 + headerLength)));
+        var pointingTypes = ["time_points", "update_points"];
+        var types = pointingTypes.length;
+        var offset = 8 + headerLength;
+
+        var sums = new Float64Array(buffer, offset, header.cells * types);
+        offset += sums.byteLength;
+        var cellCounts = new Uint32Array(buffer, offset, header.users.length);
+        offset += cellCounts.byteLength;
+        var cellDays = new Uint16Array(buffer, offset, header.cells);
+        offset += cellDays.byteLength;
+        var cellReasons = new Uint16Array(buffer, offset, header.cells * types);
+
+        var points = {};
+        var cell = 0;
+
+        for (var user = 0; user < header.users.length; user++) {
+            var userPoints = points[header.users[user]] = {};
+
+            for (var end = cell + cellCounts[user]; cell < end; cell++) {
+                var dayPoints = userPoints[header.days[cellDays[cell]]] = {};
+
+                for (var i = 0; i < types; i++) {
+                    if (cellReasons[cell * types + i] !== 0xFFFF) {
+                        dayPoints[pointingTypes[i]] = {
+                            "reasons": cellReasons[cell * types + i],
+                            "sum": sums[cell * types + i]
+                        };
+                    }
+                }
+            }
+        }
+
+        return {
+            "points": points,
+            "reasons": header.reasons,
+            "summary": header.summary,
+            "user_names": header.user_names
+        };
+    };
+
+    var getBinaryData = function (url) {
+        url = url || "data/data.bin";
+
+        return $http.get(url, {responseType: "arraybuffer"}).then(function (response) {
+            return parseData(decodeBinary(response.data));
+        });
+    };
+
+    /**
+     * Parses the index written by runner.py --shards, the days of the users
+     * are not part of it, they are loaded by loadMonth on demand
+     */
+    var parseIndex = function (data, url) {
+
+        var result = [];
+        var shards = (url || "data/index.json").replace(/\.json$/, "") + "/";
+
+        for (var userId in data["user_names"]) {
+            var row = {
+                "name": data["user_names"][userId],
+                "days": {},
+                "months": data["months"][userId] || [],
+                "loaded": {},
+                "url": shards + userId + "/",
+                "reason_table": data["reasons"]
+            };
+
+            addSummary(row, data["summary"][userId] || {}, data["reasons"]);
+
+            result.push(row);
+        }
+
+        return sortRows(result);
+    };
+
+    var getIndex = function (url) {
+        url = url || "data/index.json";
+
+        return $http.get(url).then(function (response) {
+            return parseIndex(response.data, url);
+        });
+    };
+
+    /**
+     * Loads the days of a month (YYYY-MM) into a row returned by getIndex,
+     * each shard is requested only once
+     */
+    var loadMonth = function (row, month) {
+        if (row["loaded"][month] || row["months"].indexOf(month) < 0) {
+            return $q.when(row);
+        }
+
+        return $http.get(row["url"] + month + ".json").then(function (response) {
+            row["loaded"][month] = true;
+
+            // A new object, so the watchers of the days notice the change
+            row["days"] = angular.extend({}, row["days"]);
+            addDays(row, response.data, false, row["reason_table"]);
+            return row;
+        });
+    };
+
+    var unloadedMonths = function (row) {
+        return row["months"].filter(function (month) {
+            return !row["loaded"][month];
+        });
+    };
+
+    /**
+     * Loads the latest count months of the rows returned by getIndex which
+     * aren't loaded yet, the view starts with the recent ones and goes back on demand
+     */
+    var loadEarlierMonths = function (rows, count) {
+        var requests = [];
+
+        rows.forEach(function (row) {
+            unloadedMonths(row).slice(-count).forEach(function (month) {
+                requests.push(loadMonth(row, month));
+            });
+        });
+
+        return $q.all(requests).then(function () {
+            return rows;
+        });
+    };
+
+    var hasEarlierMonths = function (rows) {
+        return rows.some(function (row) {
+            return unloadedMonths(row).length > 0;
+        });
+    };
+
     return {
         parseData: parseData,
-        getData: getData
+        getData: getData,
+        decodeBinary: decodeBinary,
+        getBinaryData: getBinaryData,
+        parseIndex: parseIndex,
+        getIndex: getIndex,
+        loadMonth: loadMonth,
+        loadEarlierMonths: loadEarlierMonths,
+        hasEarlierMonths: hasEarlierMonths
     };
 });
\ No newline at end of file
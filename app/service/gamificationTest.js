@@ -72,4 +72,194 @@ describe('redmineGamification.service gamification', function () {
         // Assert
         expect(result[0].update_points).toBeCloseTo(0);
     }));
+
+    it('should return rows with totals from the index without days', inject(function (gamificationService) {
+
+        // Arrange
+        var data = {
+            "user_names": {
+                "1": "John Doe",
+                "2": "Jane Doe"
+            },
+            "summary": {
+                "1": {"time_points": 10, "update_points": 5, "rank": 2},
+                "2": {"time_points": 30, "update_points": 20, "rank": 1}
+            },
+            "months": {
+                "1": ["2015-06"],
+                "2": ["2015-05", "2015-06"]
+            }
+        };
+
+        // Act
+        var result = gamificationService.parseIndex(data, "data/index.json");
+
+        // Assert
+        expect(result.length).toBe(2);
+        expect(result[0].name).toBe("Jane Doe");
+        expect(result[0].time_points).toBe(30);
+        expect(result[0].months).toEqual(["2015-05", "2015-06"]);
+        expect(result[0].url).toBe("data/index/2/");
+        expect(Object.keys(result[0].days).length).toBe(0);
+    }));
+
+    it('should load the days of a month once', inject(function (gamificationService, $httpBackend) {
+
+        // Arrange
+        var row = gamificationService.parseIndex({
+            "user_names": {"1": "John Doe"},
+            "summary": {"1": {"time_points": 48, "update_points": 0, "rank": 1}},
+            "months": {"1": ["2015-06"]}
+        })[0];
+
+        $httpBackend.expectGET("data/index/1/2015-06.json").respond({
+            "2015-06-01": {
+                "time_points": {"reasons": [], "sum": 0.48},
+                "update_points": {"reasons": ["Absent"], "sum": -1}
+            }
+        });
+
+        // Act
+        gamificationService.loadMonth(row, "2015-06");
+        $httpBackend.flush();
+        gamificationService.loadMonth(row, "2015-06");
+        gamificationService.loadMonth(row, "2015-07");
+
+        // Assert
+        $httpBackend.verifyNoOutstandingRequest();
+        expect(row.days["2015-06-01"]["time_points"]).toBeCloseTo(48);
+        expect(row.days["2015-06-01"]["update_points"]).toBeCloseTo(-100);
+        expect(row.time_points).toBe(48);
+    }));
+
+    it('should load the latest months first and earlier ones on demand', inject(function (gamificationService, $httpBackend) {
+
+        // Arrange
+        var rows = gamificationService.parseIndex({
+            "user_names": {"1": "John Doe"},
+            "summary": {"1": {"time_points": 48, "update_points": 0, "rank": 1}},
+            "months": {"1": ["2015-05", "2015-06", "2015-07"]}
+        });
+        var days = rows[0].days;
+
+        $httpBackend.expectGET("data/index/1/2015-06.json").respond({});
+        $httpBackend.expectGET("data/index/1/2015-07.json").respond({
+            "2015-07-01": {"time_points": {"reasons": [], "sum": 0.48}}
+        });
+
+        // Act
+        gamificationService.loadEarlierMonths(rows, 2);
+        $httpBackend.flush();
+
+        // Assert
+        $httpBackend.verifyNoOutstandingRequest();
+        expect(rows[0].days).not.toBe(days);
+        expect(rows[0].days["2015-07-01"]["time_points"]).toBeCloseTo(48);
+        expect(gamificationService.hasEarlierMonths(rows)).toBe(true);
+
+        $httpBackend.expectGET("data/index/1/2015-05.json").respond({});
+        gamificationService.loadEarlierMonths(rows, 1);
+        $httpBackend.flush();
+        expect(gamificationService.hasEarlierMonths(rows)).toBe(false);
+    }));
+
+    it('should render precomputed summary instead of computing it', inject(function (gamificationService) {
+
+        // Arrange
+        var date = new Date().toISOString().slice(0, 10);
+        var data = {
+            "points": {"1": {}, "2": {}},
+            "summary": {
+                "1": {
+                    "time_points": 10,
+                    "update_points": 0,
+                    "rank": 2,
+                    "last_7_days": {"time_points": 10},
+                    "today": {"day": "2015-06-01", "points": {"time_points": 10}, "reasons": {}}
+                },
+                "2": {"time_points": 5, "update_points": 0, "rank": 1}
+            },
+            "user_names": {
+                "1": "John Doe",
+                "2": "Jane Doe"
+            }
+        };
+
+        data.points[1][date] = {
+            "time_points": {"reasons": [], "sum": 0.1},
+            "update_points": {"reasons": ["Absent"], "sum": -1}
+        };
+
+        // Act
+        var result = gamificationService.parseData(data);
+
+        // Assert
+        expect(result[0].name).toBe("Jane Doe");
+        expect(result[1].time_points).toBe(10);
+        expect(result[1].last_7_days.time_points).toBe(10);
+        expect(result[1].days[date]["update_points"]).toBeCloseTo(-100);
+        expect(result[1].today.day).toBe(date);
+    }));
+
+    it('should decode the binary export into the JSON data', inject(function (gamificationService) {
+
+        // Arrange, written by exporter.write_binary
+        var encoded = "UkdCMrACAAB7ImNlbGxzIjogMSwgImRheXMiOiBbIjIwMTUtMDYtMDEiXSwgInJlYXNvbnMiOiB7IjEiOiAiUGVuYWx0eSBm" +
+            "b3Igbm8gbG9nZ2VkIHRpbWUiLCAiMiI6ICJQZW5hbHR5IGZvciBsb2dnaW5nIG9uIHdlZWtlbmQiLCAiNCI6ICJQZW5hbHR5" +
+            "IGZvciBsb2dnaW5nIGxlc3MgdGhhbiAzIGhvdXJzIiwgIjgiOiAiUGVuYWx0eSBmb3IgbG9nZ2luZyBtb3JlIHRoYW4gOCBo" +
+            "b3VycyIsICIxNiI6ICJSZXdhcmQgZm9yIGxvZ2dpbmcgdGltZSBvbiBtdWx0aXBsZSBpc3N1ZXMiLCAiMzIiOiAiUGVuYWx0" +
+            "eSBmb3Igbm90IGNvbW1lbnRpbmcgb24gaXNzdWVzIiwgIjY0IjogIlBlbmFsdHkgZm9yIG5vdCB1cGRhdGluZyBkb25lIHJh" +
+            "dGlvIG9uIGlzc3VlIHdpdGggbG9nZ2VkIHRpbWUiLCAiMTI4IjogIlJld2FyZCBmb3IgYXR0YWNoaW5nIGZpbGVzIiwgIjI1" +
+            "NiI6ICJSZXdhcmQgZm9yIG5pY2VseSBmb3JtYXR0ZWQgY29tbWVudHMiLCAiNTEyIjogIlJld2FyZCBmb3IgYmVpbmcgYSBz" +
+            "dG9yeSB0ZWxsZXIiLCAiMTAyNCI6ICJBYnNlbnQifSwgInN1bW1hcnkiOiB7IjEiOiB7Imxhc3RfMzBfZGF5cyI6IHt9LCAi" +
+            "bGFzdF83X2RheXMiOiB7fSwgInJhbmsiOiAxLCAidGltZV9wb2ludHMiOiA1MCwgInVwZGF0ZV9wb2ludHMiOiAwfX0sICJ1" +
+            "c2VyX25hbWVzIjogeyIxIjogIkpvaG4gRG9lIn0sICJ1c2VycyI6IFsiMSJdfSAgAAAAAAAA4D8AAAAAAADwvwEAAAAAAAQA" +
+            "AAQ=";
+        var bytes = new Uint8Array(atob(encoded).split("").map(function (c) {
+            return c.charCodeAt(0);
+        }));
+
+        // Act
+        var data = gamificationService.decodeBinary(bytes.buffer);
+
+        // Assert
+        expect(data.user_names["1"]).toBe("John Doe");
+        expect(data.summary["1"].rank).toBe(1);
+        expect(data.points["1"]["2015-06-01"]["time_points"]["sum"]).toBe(0.5);
+        expect(data.points["1"]["2015-06-01"]["time_points"]["reasons"]).toBe(4);
+        expect(data.points["1"]["2015-06-01"]["update_points"]["reasons"]).toBe(1024);
+        expect(data.reasons["4"]).toBe("Penalty for logging less than 3 hours");
+        expect(gamificationService.parseData(data)[0].time_points).toBe(50);
+    }));
+
+    it('should map reason flags of today to their texts', inject(function (gamificationService) {
+
+        // Arrange
+        var date = new Date().toISOString().slice(0, 10);
+        var data = {
+            "points": {"1": {}},
+            "reasons": {
+                "4": "Penalty for logging less than 3 hours",
+                "16": "Reward for logging time on multiple issues",
+                "1024": "Absent"
+            },
+            "user_names": {"1": "John Doe"}
+        };
+
+        data.points[1][date] = {
+            "time_points": {"reasons": 20, "sum": 0.5},
+            "update_points": {"reasons": 1024, "sum": -1}
+        };
+
+        // Act
+        var result = gamificationService.parseData(data);
+
+        // Assert
+        expect(result[0].today.reasons["time_points"].reasons).toEqual([
+            "Penalty for logging less than 3 hours",
+            "Reward for logging time on multiple issues"
+        ]);
+        expect(result[0].today.reasons["update_points"].reasons).toEqual(["Absent"]);
+        expect(result[0].time_points).toBe(50);
+    }));
 });
\ No newline at end of file
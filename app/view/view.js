@@ -10,7 +10,26 @@ angular.module('redmineGamification.view', ['ngRoute'])
 
         .controller('ViewCtrl', function (gamificationService, $scope) {
 
-            gamificationService.getData().then(function (data) {
-                $scope.data = data;
+            // The index of runner.py --shards comes with the days of the latest months only,
+            // without an index the data file holding all the days is read, the binary one of
+            // runner.py --binary if there is one, else the JSON one
+            gamificationService.getIndex().then(function (rows) {
+                $scope.data = rows;
+
+                $scope.hasEarlierMonths = function () {
+                    return gamificationService.hasEarlierMonths(rows);
+                };
+
+                $scope.loadEarlierMonths = function () {
+                    return gamificationService.loadEarlierMonths(rows, 1);
+                };
+
+                return gamificationService.loadEarlierMonths(rows, 2);
+            }, function () {
+                return gamificationService.getBinaryData().catch(function () {
+                    return gamificationService.getData();
+                }).then(function (data) {
+                    $scope.data = data;
+                });
             });
         });
\ No newline at end of file
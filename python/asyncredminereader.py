@@ -0,0 +1,121 @@
+import asyncio
+import datetime
+import redminereader
+from redmine.aio import AsyncRedmine
+
+
+class AsyncRedmineReader(redminereader.RedmineReader):
+    """Class reading the meta data out of Redmine on an asyncio event loop"""
+
+    def __init__(self, redmine, project_name, issue_batch_size=50, concurrency=4, columnar=False):
+        """
+        Initializes the reader on top of an AsyncRedmine instance, which can be
+        shared among several readers so they use the same connection pool,
+        the project is opened by open()
+
+        :param redmine: AsyncRedmine instance
+        :param project_name:Name of the project, this can be read from the URL, e.g. https://redmine.com/projects/{project}
+        :param issue_batch_size:How many issue ids to request in a single issue_id filter
+        :param concurrency:How many issue batches to request at the same time
+        :param columnar:Flag indicating whether to collect the entry meta into an EntryTable instead of dicts
+        """
+
+        self.redmine = redmine
+        self.project_name = project_name
+        self.project = None
+        self.issue_batch_size = issue_batch_size
+        self.concurrency = concurrency
+        self.columnar = columnar
+
+    async def open(self):
+        """Opens the project"""
+        self.project = await self.redmine.project.get(self.project_name)
+        return self
+
+    async def analyze_time_entries(self, days_backwards):
+        """
+        Asynchronous version of RedmineReader.analyze_time_entries
+
+        :param days_backwards: Timedelta indicating how much time to look back, e.g. 10 days
+        :return: The dict with the meta data and the set of issues it found
+        """
+
+        from_date = datetime.date.today() - datetime.timedelta(days=days_backwards)
+        user_names = {}
+        entry_meta = self.new_entry_meta()
+        watched_issue_ids = set()
+
+        async for entry in self.redmine.time_entry.all(project_id=self.project.id, from_date=from_date):
+            self.add_time_entry(entry_meta, user_names, entry.user.id, entry.user.name, entry.issue.id, entry.spent_on, entry.hours)
+            watched_issue_ids.add(entry.issue.id)
+
+        return entry_meta, watched_issue_ids, user_names
+
+    async def analyze_issues(self, entry_meta, watched_issue_ids):
+        """
+        Asynchronous version of RedmineReader.analyze_issues
+
+        :param entry_meta: Entries analyzed earlier, necessary to know which days to ignore
+        :param watched_issue_ids: Issues found while analyzing the entries, necessary to know which issues to fetch
+        :return: Dictionary with analyzed issue data
+        """
+
+        issue_meta = {}
+
+        for issue in await self.fetch_issues(watched_issue_ids):
+            issue_meta[issue.id] = self.summarize_issue(issue)
+
+            for journal in issue.journals:
+                self.add_journal(entry_meta, issue.id, *self.summarize_journal(journal))
+
+        return issue_meta
+
+    async def fetch_issues(self, issue_ids):
+        """
+        Asynchronous version of RedmineReader.fetch_issues
+
+        :param issue_ids: Ids of the issues to fetch
+        :return: List of the issues found
+        """
+
+        issue_ids = sorted(issue_ids)
+        batches = [issue_ids[i:i + self.issue_batch_size] for i in range(0, len(issue_ids), self.issue_batch_size)]
+        semaphore = asyncio.Semaphore(max(1, self.concurrency))
+
+        async def fetch(batch):
+            async with semaphore:
+                return list(await self.redmine.issue.filter(
+                    project_id=self.project.id,
+                    issue_id=','.join(str(issue_id) for issue_id in batch),
+                    include='journals',
+                    status_id="*"))
+
+        return [issue for issues in await asyncio.gather(*(fetch(batch) for batch in batches)) for issue in issues]
+
+    async def analyze(self, days_backwards):
+        """
+        Opens the project and analyzes both its time entries and issues
+
+        :return: The entry meta, the watched issues, the user names and the issue meta
+        """
+
+        await self.open()
+        entry_meta, watched_issue_ids, user_names = await self.analyze_time_entries(days_backwards)
+        issue_meta = await self.analyze_issues(entry_meta, watched_issue_ids)
+        return entry_meta, watched_issue_ids, user_names, issue_meta
+
+
+async def analyze_projects(url, user, password, project_names, days_backwards, verify=True, **kwargs):
+    """
+    Analyzes several projects at once on a single connection pool
+
+    :param project_names: Names of the projects to analyze
+    :param kwargs: Further arguments of AsyncRedmineReader, e.g. issue_batch_size
+    :return: Dictionary of project names and the results of AsyncRedmineReader.analyze
+    """
+
+    async with AsyncRedmine(url, username=user, password=password, requests={'verify': verify}, streaming=True) as redmine:
+        readers = [AsyncRedmineReader(redmine, project_name, **kwargs) for project_name in project_names]
+        results = await asyncio.gather(*(reader.analyze(days_backwards) for reader in readers))
+
+    return dict(zip(project_names, results))
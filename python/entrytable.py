@@ -0,0 +1,156 @@
+from array import array
+
+
+class EntryTable:
+    """Columnar replacement of the nested entry meta dictionaries
+
+    Users and days are interned into indexes, every (user, day) pair is a cell and
+    every (cell, issue) pair is a row, the values are kept in typed arrays instead
+    of a dictionary per day and per issue. RedmineReader fills it in place of the
+    entry meta dict and both engines accept it.
+    """
+
+    def __init__(self):
+        # Interned users and days
+        self.user_ids = []
+        self.user_index = {}
+        self.days = []
+        self.day_index = {}
+        self.day_of_week = array('b')
+
+        # Cells, i.e. days of the users
+        self.cell_user = array('q')
+        self.cell_day = array('q')
+        self.total_hours = array('d')
+        self.cell_index = {}
+
+        # Rows, i.e. issues of the cells
+        self.row_cell = array('q')
+        self.issue_id = array('q')
+        self.hours = array('d')
+        self.updates = array('q')
+        self.comment_length = array('q')
+        self.comment_extra = array('q')
+        self.attachments = array('q')
+        self.row_index = {}
+
+    def add_time_entry(self, user_id, spent_on, issue_id, hours):
+        """
+        Adds a single time entry to the table
+
+        :param spent_on: Date the time was logged for
+        :return: True if this is the first time the issue shows up on that day
+        """
+
+        user = self.user_index.get(user_id)
+
+        if user is None:
+            user = self.user_index[user_id] = len(self.user_ids)
+            self.user_ids.append(user_id)
+
+        key = spent_on.isoformat()
+        day = self.day_index.get(key)
+
+        if day is None:
+            day = self.day_index[key] = len(self.days)
+            self.days.append(key)
+            self.day_of_week.append(spent_on.weekday())
+
+        cell = self.cell_index.get((user << 32) | day)
+
+        if cell is None:
+            cell = self.cell_index[(user << 32) | day] = len(self.cell_user)
+            self.cell_user.append(user)
+            self.cell_day.append(day)
+            self.total_hours.append(0)
+
+        row, first_seen = self.row(cell, issue_id)
+
+        self.hours[row] += hours
+        self.total_hours[cell] += hours
+
+        return first_seen
+
+    def add_journal(self, issue_id, user_id, created_on, notes_length, attachments):
+        """Adds a single journal summarized by RedmineReader.summarize_journal to the table"""
+        user = self.user_index.get(user_id)
+        day = self.day_index.get(created_on)
+
+        if user is None or day is None or ((user << 32) | day) not in self.cell_index:
+            return
+
+        row, first_seen = self.row(self.cell_index[(user << 32) | day], issue_id)
+
+        self.updates[row] += 1
+
+        if notes_length is not None:
+            self.comment_length[row] += notes_length
+            self.comment_extra[row] += 1
+
+        self.attachments[row] += attachments
+
+    def row(self, cell, issue_id):
+        """Returns the row of the issue in the cell and whether it had to be added"""
+        row = self.row_index.get((cell << 32) | issue_id)
+
+        if row is not None:
+            return row, False
+
+        row = self.row_index[(cell << 32) | issue_id] = len(self.row_cell)
+        self.row_cell.append(cell)
+        self.issue_id.append(issue_id)
+
+        for column in (self.hours, self.updates, self.comment_length, self.comment_extra, self.attachments):
+            column.append(0)
+
+        return row, True
+
+    def weekdays(self):
+        """Returns the ISO dates of the weekdays anyone logged time on"""
+        return [key for day, key in enumerate(self.days) if self.day_of_week[day] < 5]
+
+    def __iter__(self):
+        """Iterates over the user ids"""
+        return iter(self.user_ids)
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    def __contains__(self, user_id):
+        return user_id in self.user_index
+
+    def to_entry_meta(self, user_ids=None):
+        """
+        Returns the content of the table in the nested entry meta format of RedmineReader
+
+        :param user_ids: Users to return, all of them if None
+        """
+
+        entry_meta = {}
+        users = None if user_ids is None else set(self.user_index[user_id] for user_id in user_ids)
+
+        for cell, user in enumerate(self.cell_user):
+            if users is not None and user not in users:
+                continue
+
+            days = entry_meta.setdefault(self.user_ids[user], {'days': {}})['days']
+            days[self.days[self.cell_day[cell]]] = {
+                'total_hours': self.total_hours[cell],
+                'day_of_week': self.day_of_week[self.cell_day[cell]]
+            }
+
+        for row, cell in enumerate(self.row_cell):
+            if users is not None and self.cell_user[cell] not in users:
+                continue
+
+            user_id = self.user_ids[self.cell_user[cell]]
+            day = entry_meta[user_id]['days'][self.days[self.cell_day[cell]]]
+            day[self.issue_id[row]] = {
+                'hours': self.hours[row],
+                'updates': self.updates[row],
+                'comment_length': self.comment_length[row],
+                'comment_extra': self.comment_extra[row],
+                'attachments': self.attachments[row]
+            }
+
+        return entry_meta
@@ -0,0 +1,362 @@
+import os
+import re
+import sys
+import json
+import math
+import struct
+import datetime
+from array import array
+import gamificationengine
+import tempfile
+import contextlib
+
+
+@contextlib.contextmanager
+def atomic_open(file_name, mode='w'):
+    """
+    Opens a temporary file next to the given one, which replaces it only once it's
+    completely written, so readers either see the previous or the new content
+
+    :param file_name: Location of the file to be replaced
+    :param mode: Mode of the temporary file, 'w' or 'wb'
+    """
+
+    directory, name = os.path.split(os.path.abspath(file_name))
+    file = tempfile.NamedTemporaryFile(mode=mode, dir=directory, prefix='.' + name + '.', suffix='.tmp', delete=False)
+
+    try:
+        with file:
+            yield file
+            file.flush()
+            os.fsync(file.fileno())
+
+        # Temporary files are private, the result should get the usual permissions
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(file.name, 0o666 & ~umask)
+
+        os.replace(file.name, file_name)
+    except BaseException:
+        os.remove(file.name)
+        raise
+
+
+def write_json(file_name, user_names, user_points):
+    """
+    Writes the points into a JSON file user by user, the keys are in sorted order like json.dump({"user_names":
+    user_names, "points": points, "reasons": REASONS, "summary": summary}, file, sort_keys=True) would write
+    them, see summarize_points() for the summary and gamificationengine.REASONS for the texts of the reason flags
+
+    :param file_name: Location of the JSON file, it's replaced atomically
+    :param user_names: Dictionary of user ids and names
+    :param user_points: Iterable of (user_id, points of the user) pairs in ascending user id order,
+                        e.g. GamificationEngine.iter_points()
+    """
+
+    today = utc_today()
+    summary = {}
+
+    with atomic_open(file_name) as file:
+        file.write('{"points": {')
+
+        for i, (user_id, points) in enumerate(user_points):
+            if i > 0:
+                file.write(', ')
+
+            file.write(json.dumps(str(user_id)))
+            file.write(': ')
+            file.write(json.dumps(points, sort_keys=True))
+
+            summary[user_id] = summarize_points(points, today)
+
+        rank_summary(summary)
+
+        file.write('}, "reasons": ')
+        file.write(json.dumps(gamificationengine.REASONS, sort_keys=True))
+        file.write(', "summary": ')
+        file.write(json.dumps(summary, sort_keys=True))
+        file.write(', "user_names": ')
+        file.write(json.dumps(user_names, sort_keys=True))
+        file.write('}')
+
+
+# Magic of the binary format, see write_binary()
+BINARY_MAGIC = b'RGB2'
+
+# Pointing types of a cell, in the order the binary format packs them
+POINTING_TYPES = ('time_points', 'update_points')
+
+
+def write_binary(file_name, user_names, user_points):
+    """
+    Writes the points into a compact binary file, the dates are stored only once in a
+    string table, the sums and the reason flags in packed arrays, read_binary() and decodeBinary() of the
+    dashboard turn it back to the content write_json() would have written
+
+    The layout, all numbers are little-endian:
+    - the magic "RGB2" and the length of the header as uint32
+    - the header, UTF-8 JSON holding the user ids and names, the number of cells, the summary, the
+      string table of the days and the texts of the reason flags, padded with spaces to a multiple of 8 bytes
+    - the sums of the cells, float64 for every cell and pointing type, NaN if a type is missing
+    - the number of cells of the users, uint32 for every user
+    - the days of the cells, uint16 indexes into the days
+    - the reasons of the cells, uint16 reason flags for every cell and pointing type, 0xFFFF if a type is missing
+
+    :param file_name: Location of the binary file, it's replaced atomically
+    :param user_names: Dictionary of user ids and names
+    :param user_points: Iterable of (user_id, points of the user) pairs, e.g. GamificationEngine.iter_points()
+    """
+
+    today = utc_today()
+    users = []
+    summary = {}
+    days = {}
+
+    sums = array('d')
+    cell_counts = array('I')
+    cell_days = array('H')
+    cell_reasons = array('H')
+
+    def index(table, key):
+        if key not in table:
+            table[key] = len(table)
+
+        return table[key]
+
+    for user_id, points in user_points:
+        users.append(str(user_id))
+        summary[user_id] = summarize_points(points, today)
+        cell_counts.append(len(points))
+
+        for day in sorted(points):
+            cell_days.append(index(days, day))
+
+            for pointing_type in POINTING_TYPES:
+                point = points[day].get(pointing_type)
+
+                if point is None:
+                    sums.append(float('nan'))
+                    cell_reasons.append(0xFFFF)
+                else:
+                    sums.append(point['sum'])
+                    cell_reasons.append(point['reasons'])
+
+    rank_summary(summary)
+
+    header = json.dumps({
+        "users": users,
+        "cells": len(cell_days),
+        "user_names": user_names,
+        "summary": summary,
+        "days": sorted(days, key=days.get),
+        "reasons": gamificationengine.REASONS
+    }, sort_keys=True).encode('utf-8')
+    header += b' ' * (-len(header) % 8)
+
+    with atomic_open(file_name, 'wb') as file:
+        file.write(BINARY_MAGIC)
+        file.write(struct.pack('<I', len(header)))
+        file.write(header)
+
+        for column in (sums, cell_counts, cell_days, cell_reasons):
+            column = array(column.typecode, column)
+
+            if sys.byteorder == 'big':
+                column.byteswap()
+
+            column.tofile(file)
+
+
+def read_binary(file_name):
+    """
+    Reads a file written by write_binary()
+
+    :return: Dictionary with the same content json.load() gives for the file of write_json()
+    """
+
+    with open(file_name, 'rb') as file:
+        content = file.read()
+
+    if content[:4] != BINARY_MAGIC:
+        raise ValueError('{0} is not a binary points file'.format(file_name))
+
+    header_length, = struct.unpack_from('<I', content, 4)
+    header = json.loads(content[8:8 + header_length].decode('utf-8'))
+    offset = 8 + header_length
+
+    def column(typecode, length):
+        nonlocal offset
+        values = array(typecode)
+        values.frombytes(content[offset:offset + length * values.itemsize])
+        offset += length * values.itemsize
+
+        if sys.byteorder == 'big':
+            values.byteswap()
+
+        return values
+
+    users = header['users']
+    types = len(POINTING_TYPES)
+
+    sums = column('d', header['cells'] * types)
+    cell_counts = column('I', len(users))
+    cell_days = column('H', header['cells'])
+    cell_reasons = column('H', header['cells'] * types)
+
+    points = {}
+    cell = 0
+
+    for user, user_id in enumerate(users):
+        user_points = points[user_id] = {}
+
+        for _ in range(cell_counts[user]):
+            day_points = user_points[header['days'][cell_days[cell]]] = {}
+
+            for i, pointing_type in enumerate(POINTING_TYPES):
+                if cell_reasons[cell * types + i] != 0xFFFF:
+                    day_points[pointing_type] = {
+                        'reasons': cell_reasons[cell * types + i],
+                        'sum': sums[cell * types + i]
+                    }
+
+            cell += 1
+
+    return {"points": points, "reasons": header['reasons'], "summary": header['summary'], "user_names": header['user_names']}
+
+
+def client_round(value):
+    """Rounds the way Math.round() of the dashboard does, i.e. halves upwards instead of to even"""
+    return int(math.floor(value + 0.5))
+
+
+def write_shards(file_name, user_names, user_points):
+    """
+    Writes the points into an index file and per-user, per-month shard files next to it, the
+    dashboard loads the index first and the shards only when they are shown
+
+    The index holds the user names, the summary of the points (see summarize_points()), the texts
+    of the reason flags and the months of each user, the shards of index.json are stored as index/{user_id}/{YYYY-MM}.json,
+    each of them holding the days of the month in the same format as the points of write_json.
+    The index is written last, so it only ever refers to complete shards, the shards it no
+    longer lists, e.g. of months which left the time window, are removed afterwards.
+
+    :param file_name: Location of the index file, e.g. app/data/index.json
+    :param user_names: Dictionary of user ids and names
+    :param user_points: Iterable of (user_id, points of the user) pairs, e.g. GamificationEngine.iter_points()
+    """
+
+    directory = os.path.splitext(file_name)[0]
+    os.makedirs(directory, exist_ok=True)
+    today = utc_today()
+    summary = {}
+    months = {}
+
+    for user_id, points in user_points:
+        user_directory = os.path.join(directory, str(user_id))
+        os.makedirs(user_directory, exist_ok=True)
+
+        shards = {}
+        for day, day_points in points.items():
+            shards.setdefault(day[:7], {})[day] = day_points
+
+        for month, days in shards.items():
+            with atomic_open(os.path.join(user_directory, month + '.json')) as file:
+                json.dump(days, file, sort_keys=True)
+
+        summary[user_id] = summarize_points(points, today)
+        months[user_id] = sorted(shards)
+
+    rank_summary(summary)
+
+    with atomic_open(file_name) as file:
+        json.dump({
+            "user_names": user_names,
+            "summary": summary,
+            "months": months,
+            "reasons": gamificationengine.REASONS
+        }, file, sort_keys=True)
+
+    remove_stale_shards(directory, months)
+
+
+def remove_stale_shards(directory, months):
+    """
+    Removes the shard files of the months (and the directories of the users) an index doesn't list anymore
+
+    :param directory: Directory of the shards, e.g. app/data/index
+    :param months: Dictionary of user ids and the months of their shards which are kept
+    """
+
+    kept = dict((str(user_id), set(month + '.json' for month in user_months))
+                for user_id, user_months in months.items())
+
+    for user_id in os.listdir(directory):
+        user_directory = os.path.join(directory, user_id)
+
+        if not os.path.isdir(user_directory):
+            continue
+
+        for name in os.listdir(user_directory):
+            if re.match(r'^\d{4}-\d{2}\.json$', name) and name not in kept.get(user_id, ()):
+                os.remove(os.path.join(user_directory, name))
+
+        if user_id not in kept and not os.listdir(user_directory):
+            os.rmdir(user_directory)
+
+
+def utc_today():
+    """Returns the current day, the dashboard takes it in UTC as well"""
+    return datetime.datetime.utcnow().date()
+
+
+def summarize_points(points, today):
+    """
+    Computes the aggregates the dashboard shows for a user, every day is rounded to hundredths
+    the way the dashboard does, and clamped at zero when summed up, so absent days don't count
+
+    :param points: Points of a single user
+    :param today: Day the "today" entry and the rolling sums are taken for
+    :return: Dictionary of the totals per pointing type, e.g. "time_points": 120, the sums of the
+             last 7 and 30 days ending today, and the "today" entry if the user has points on that day
+    """
+
+    summary = {"last_7_days": {}, "last_30_days": {}}
+    rolling = [
+        ("last_7_days", (today - datetime.timedelta(days=6)).isoformat()),
+        ("last_30_days", (today - datetime.timedelta(days=29)).isoformat())
+    ]
+    today = today.isoformat()
+
+    for day, day_points in points.items():
+        for pointing_type, point in day_points.items():
+            value = max(0, client_round(point['sum'] * 100))
+            summary[pointing_type] = summary.get(pointing_type, 0) + value
+
+            for key, first_day in rolling:
+                if first_day <= day <= today:
+                    summary[key][pointing_type] = summary[key].get(pointing_type, 0) + value
+
+    if today in points:
+        summary["today"] = {
+            "day": today,
+            "points": dict((pointing_type, client_round(point['sum'] * 100))
+                           for pointing_type, point in points[today].items()),
+            "reasons": points[today]
+        }
+
+    return summary
+
+
+def rank_summary(summary):
+    """
+    Ranks the users of the summary by their total points starting from 1, ties are
+    ordered by user id, the same way the dashboard orders them
+
+    :param summary: Dictionary of user ids and their summarize_points(), ranks are added in place
+    """
+
+    def total(user_id):
+        return summary[user_id].get("time_points", 0) + summary[user_id].get("update_points", 0)
+
+    for rank, user_id in enumerate(sorted(summary, key=lambda user_id: (-total(user_id), user_id)), 1):
+        summary[user_id]["rank"] = rank
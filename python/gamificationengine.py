@@ -1,4 +1,36 @@
+import os
 import datetime
+import entrytable
+from concurrent.futures import ProcessPoolExecutor
+
+
+# Reasons of the points are bit flags, the reasons of a day are the sum of its flags,
+# the flags of the time points come first, in the order they are checked
+NO_LOGGED_TIME = 1
+LOGGED_ON_WEEKEND = 2
+LOGGED_LESS_THAN_3_HOURS = 4
+LOGGED_MORE_THAN_8_HOURS = 8
+LOGGED_ON_MULTIPLE_ISSUES = 16
+NO_COMMENTS = 32
+NO_DONE_RATIO = 64
+ATTACHED_FILES = 128
+NICE_COMMENTS = 256
+STORY_TELLER = 512
+ABSENT = 1024
+
+REASONS = {
+    NO_LOGGED_TIME: "Penalty for no logged time",
+    LOGGED_ON_WEEKEND: "Penalty for logging on weekend",
+    LOGGED_LESS_THAN_3_HOURS: "Penalty for logging less than 3 hours",
+    LOGGED_MORE_THAN_8_HOURS: "Penalty for logging more than 8 hours",
+    LOGGED_ON_MULTIPLE_ISSUES: "Reward for logging time on multiple issues",
+    NO_COMMENTS: "Penalty for not commenting on issues",
+    NO_DONE_RATIO: "Penalty for not updating done ratio on issue with logged time",
+    ATTACHED_FILES: "Reward for attaching files",
+    NICE_COMMENTS: "Reward for nicely formatted comments",
+    STORY_TELLER: "Reward for being a story teller",
+    ABSENT: "Absent"
+}
 
 
 class GamificationEngine:
@@ -43,39 +75,39 @@ class GamificationEngine:
         for key, day in user['days'].items():
 
             time_points = [self.config["time"]["default"]]
-            reasons = []
+            reasons = 0
 
             # Updated time?
             if day['total_hours'] > 0:
                 time_points += [self.config["time"]["for_update"]]
             elif self.config["time"]["for_update"] > 0.0:
-                reasons += ["Penalty for no logged time"]
+                reasons |= NO_LOGGED_TIME
 
             if day['day_of_week'] < 5:
                 time_points += [self.config["time"]["for_update_on_weekday"]]
             elif self.config["time"]["for_update_on_weekday"] > 0.0:
-                reasons += ["Penalty for logging on weekend"]
+                reasons |= LOGGED_ON_WEEKEND
 
             # Worked at least 5 hours?
             dummy_entry_suspected = 3 - min(3, day['total_hours'])
             time_points += [self.config["time"]["for_at_least_3"] * (1 / (1 + dummy_entry_suspected))]
 
             if day['total_hours'] < 3 and self.config["time"]["for_at_least_3"] > 0.0:
-                reasons += ["Penalty for logging less than 3 hours"]
+                reasons |= LOGGED_LESS_THAN_3_HOURS
 
             # Probably only for today?
             overtime_suspected = max(0, day['total_hours'] - 8)
             time_points += [self.config["time"]["for_max_8"] * (1 / (1 + overtime_suspected))]
 
             if day['total_hours'] > 8 and self.config["time"]["for_max_8"] > 0.0:
-                reasons += ["Penalty for logging more than 8 hours"]
+                reasons |= LOGGED_MORE_THAN_8_HOURS
 
             # How many issues have hours ?
             issues_with_hours = len([issue for id, issue in day.items() if isinstance(id, int) and issue['hours'] > 0.0])
             time_points += [self.config["time"]["for_distibuted"] * (1 - 1/(1 + issues_with_hours))]
 
             if issues_with_hours > 1 and self.config["time"]["for_distibuted"] > 0.0:
-                reasons += ["Reward for logging time on multiple issues"]
+                reasons |= LOGGED_ON_MULTIPLE_ISSUES
 
             if key in points[user_id]:
                 points[user_id][key]['time_points'] = {
@@ -89,7 +121,7 @@ class GamificationEngine:
         # Look at updates
         for key, day in user['days'].items():
             update_points = [self.config["update"]["default"]]
-            reasons = []
+            reasons = 0
 
             # Any comments to any of the updated issues?
             comment_sum = sum([issue['comment_length'] for id, issue in day.items() if isinstance(id, int)])
@@ -97,7 +129,7 @@ class GamificationEngine:
             if comment_sum > 0:
                 update_points += [self.config["update"]["for_any_comment"]]
             elif self.config["update"]["for_any_comment"] > 0:
-                reasons += ["Penalty for not commenting on issues"]
+                reasons |= NO_COMMENTS
 
             # All issues excluding Meeting and above ids
             issues = [id for id, issue in day.items() if isinstance(id, int) and id in issue_meta and issue_meta[id]['tracker'] in self.config["trackers"]]
@@ -110,7 +142,7 @@ class GamificationEngine:
 
             update_points += [self.config["update"]["for_done_ratio"] * (1/(1+without_done_ratio))]
             if without_done_ratio > 0:
-                reasons += ["Penalty for not updating done ratio on issue with logged time"]
+                reasons |= NO_DONE_RATIO
 
             # Were there any attachments?
             number_of_attachments = sum([issue['attachments'] for id, issue in day.items() if id in issue_meta])
@@ -118,7 +150,7 @@ class GamificationEngine:
             update_points += [self.config["update"]["for_attachment"] * (1 - (1/(1+number_of_attachments)))]
 
             if number_of_attachments > 0 and self.config["update"]["for_attachment"] > 0.0:
-                reasons += ["Reward for attaching files"]
+                reasons |= ATTACHED_FILES
 
             # Were there any nicely formatted comments ?
             formatted_comments = sum([issue['comment_extra'] for id, issue in day.items() if id in issue_meta])
@@ -126,7 +158,7 @@ class GamificationEngine:
             update_points += [self.config["update"]["for_nice_comments"] * (1 - (1/(1+formatted_comments/2)))]
 
             if formatted_comments > 0 and self.config["update"]["for_nice_comments"] > 0:
-                reasons += ["Reward for nicely formatted comments"]
+                reasons |= NICE_COMMENTS
 
             # Rewards loads of comments
             comment_extra = max(0, comment_sum - 150)
@@ -134,7 +166,7 @@ class GamificationEngine:
             update_points += [self.config["update"]["for_story_teller"] * (1 - (1/(1+number_of_attachments/50)))]
 
             if comment_extra > 0 and self.config["update"]["for_story_teller"] > 0.0:
-                reasons += ["Reward for being a story teller"]
+                reasons |= STORY_TELLER
 
             if key in points[user_id]:
                 points[user_id][key]['update_points'] = {
@@ -146,33 +178,174 @@ class GamificationEngine:
         """
         Calculates to gamification points for the days in the entry meta
 
-        :param entry_meta: Entry meta analyzed
+        :param entry_meta: Entry meta analyzed, either the nested dicts or an EntryTable
         :param issue_meta: Issue meta analyzed
         :return: Dictionary with points assigned to users and days
         """
 
-        # Assigned points
+        # Which days count ?
+        all_days = self.all_days(entry_meta)
+
+        return self.score_users(entry_meta, issue_meta, all_days)
+
+    def iter_points(self, entry_meta, issue_meta):
+        """
+        Same as calculate_points, but yields the points user by user as soon as they are
+        calculated, so the points of all users don't have to be kept in memory
+
+        :return: Generator of (user_id, points of the user) pairs in ascending user id order
+        """
+
+        all_days = self.all_days(entry_meta)
+
+        if isinstance(entry_meta, entrytable.EntryTable):
+            entry_meta = entry_meta.to_entry_meta()
+
+        for user_id in sorted(entry_meta):
+            yield user_id, self.score_users({user_id: entry_meta[user_id]}, issue_meta, all_days)[user_id]
+
+    def calculate_points_parallel(self, entry_meta, issue_meta, processes=None):
+        """
+        Same as calculate_points, but the users are split into shards which are scored on a process pool
+
+        Each shard carries only the days of its own users and the issue meta of the issues
+        they logged time on, so nothing is sent to the processes more than once.
+
+        :param processes: Number of processes and shards, defaults to the number of CPUs
+        :return: Dictionary with points assigned to users and days
+        """
+
+        processes = processes or os.cpu_count() or 1
+        all_days = self.all_days(entry_meta)
+        user_ids = list(entry_meta)
+        shards = []
+
+        for shard in range(processes):
+            shard_user_ids = user_ids[shard::processes]
+
+            if isinstance(entry_meta, entrytable.EntryTable):
+                shard_entry_meta = entry_meta.to_entry_meta(shard_user_ids)
+            else:
+                shard_entry_meta = {user_id: entry_meta[user_id] for user_id in shard_user_ids}
+
+            shard_issue_meta = {}
+            for user in shard_entry_meta.values():
+                for day in user['days'].values():
+                    for issue_id in day:
+                        if issue_id in issue_meta:
+                            shard_issue_meta[issue_id] = issue_meta[issue_id]
+
+            if shard_entry_meta:
+                shards.append((shard_entry_meta, shard_issue_meta))
+
         points = {}
 
-        # Which days count ?
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            futures = [executor.submit(_score_shard, self.__class__, self.config, shard_entry_meta, shard_issue_meta, all_days)
+                       for shard_entry_meta, shard_issue_meta in shards]
+
+            for future in futures:
+                points.update(future.result())
+
+        return points
+
+    def recalculate_points(self, points, entry_meta, issue_meta, dirty):
+        """
+        Incremental alternative of calculate_points, only the dirty cells are scored again
+
+        Days which start to count get "Absent" cells for everyone, days and users which
+        are no longer in the entry meta are dropped, the rest is taken over from the
+        previous points, so the result is the same as calculate_points would give as long
+        as every changed cell is marked dirty.
+
+        :param points: Points calculated earlier, they aren't modified
+        :param entry_meta: Entry meta analyzed, either the nested dicts or an EntryTable
+        :param issue_meta: Issue meta analyzed
+        :param dirty: Set of (user_id, YYYY-MM-DD) cells which changed since the points were calculated
+        :return: Dictionary with points assigned to users and days
+        """
+
+        all_days = self.all_days(entry_meta)
+        dirty = set((user_id, key) for user_id, key in dirty if key in all_days and user_id in entry_meta)
+        recalculated = {}
+
+        for user_id in entry_meta:
+            previous = points.get(user_id, {})
+            kept = dict((key, previous[key]) for key in all_days if key in previous and (user_id, key) not in dirty)
+
+            recalculated[user_id] = self.absent_points([user_id], all_days - set(kept))[user_id]
+            recalculated[user_id].update(kept)
+
+        # Score the dirty cells only
+        dirty_users = set(user_id for user_id, key in dirty)
+
+        if isinstance(entry_meta, entrytable.EntryTable):
+            entry_meta = entry_meta.to_entry_meta(dirty_users)
+
+        dirty_entry_meta = {}
+        for user_id in dirty_users:
+            days = entry_meta[user_id]['days']
+            dirty_entry_meta[user_id] = {
+                'days': dict((key, day) for key, day in days.items() if (user_id, key) in dirty)
+            }
+
+        scored = self.score_users(dirty_entry_meta, issue_meta, set(key for user_id, key in dirty))
+
+        for user_id, key in dirty:
+            recalculated[user_id][key] = scored[user_id][key]
+
+        return recalculated
+
+    def score_users(self, entry_meta, issue_meta, all_days):
+        """
+        Calculates the points of the users in the entry meta on the given days
+
+        :param all_days: Days which count, see all_days()
+        :return: Dictionary with points assigned to users and days
+        """
+
+        # This engine scores the nested format
+        if isinstance(entry_meta, entrytable.EntryTable):
+            entry_meta = entry_meta.to_entry_meta()
+
+        # Assigned points
+        points = self.absent_points(entry_meta, all_days)
+
+        for user_id, user in entry_meta.items():
+            self.fill_in_time_points(user_id, user, entry_meta, issue_meta, all_days, points)
+            self.fill_in_update_points(user_id, user, entry_meta, issue_meta, all_days, points)
+
+        return points
+
+    def all_days(self, entry_meta):
+        """Returns the set of days which count, i.e. the weekdays anyone logged time on"""
+        if isinstance(entry_meta, entrytable.EntryTable):
+            return set(entry_meta.weekdays())
+
         all_days = []
         for user in entry_meta.values():
             for day, data in user["days"].items():
                 if data["day_of_week"] < 5:
                     all_days += [day]
 
-        all_days = set(all_days)
+        return set(all_days)
 
-        for user_id, user in entry_meta.items():
+    def absent_points(self, entry_meta, all_days):
+        """Returns points of all users being absent on all days"""
+        points = {}
+
+        for user_id in entry_meta:
 
             default_point_dict = {
-                'time_points': {'sum': self.config["time"]["default"], 'reasons': ["Absent"]},
-                'update_points': {'sum': self.config["update"]["default"], 'reasons': ["Absent"]},
+                'time_points': {'sum': self.config["time"]["default"], 'reasons': ABSENT},
+                'update_points': {'sum': self.config["update"]["default"], 'reasons': ABSENT},
             }
 
             points[user_id] = {day: default_point_dict.copy() for day in all_days}
 
-            self.fill_in_time_points(user_id, user, entry_meta, issue_meta, all_days, points)
-            self.fill_in_update_points(user_id, user, entry_meta, issue_meta, all_days, points)
-
         return points
+
+
+def _score_shard(engine_class, config, entry_meta, issue_meta, all_days):
+    """Scores a shard of users in a worker process of GamificationEngine.calculate_points_parallel"""
+    return engine_class(config).score_users(entry_meta, issue_meta, all_days)
@@ -0,0 +1,285 @@
+import gc
+import numpy
+import entrytable
+import gamificationengine
+
+# Whether sum() compensates the rounding errors of floats, which plain additions don't
+COMPENSATED_SUM = sum([1.0, 1e100, 1.0, -1e100]) != 0.0
+
+
+class NumpyGamificationEngine(gamificationengine.GamificationEngine):
+    """Gamification engine scoring all user-days at once with NumPy array operations
+
+    Gives the very same points as GamificationEngine, the meta data is turned into columns
+    first, one row per user, day and issue, and every time/update component is computed
+    for all the weekdays of all the users in a few array operations.
+    """
+
+    def columns(self, entry_meta, issue_meta, all_days):
+        """
+        Turns the entry meta into columnar arrays
+
+        :return: Tuple of the cells (user_id, day) and a dict of cell and row arrays
+        """
+
+        if isinstance(entry_meta, entrytable.EntryTable):
+            return self.table_columns(entry_meta, issue_meta)
+
+        cells = []
+        total_hours = []
+        day_of_week = []
+        row_cell = []
+        hours = []
+        comment_length = []
+        comment_extra = []
+        attachments = []
+        in_issue_meta = []
+        counted_tracker = []
+        done_ratio = []
+
+        trackers = set(self.config["trackers"])
+
+        for user_id, user in entry_meta.items():
+            for key, day in user['days'].items():
+                if key not in all_days:
+                    continue
+
+                cell = len(cells)
+                cells.append((user_id, key))
+                total_hours.append(day['total_hours'])
+                day_of_week.append(day['day_of_week'])
+
+                for issue_id, issue in day.items():
+                    if not isinstance(issue_id, int):
+                        continue
+
+                    meta = issue_meta.get(issue_id)
+
+                    row_cell.append(cell)
+                    hours.append(issue['hours'])
+                    comment_length.append(issue['comment_length'])
+                    comment_extra.append(issue['comment_extra'])
+                    attachments.append(issue['attachments'])
+                    in_issue_meta.append(meta is not None)
+                    counted_tracker.append(meta is not None and meta['tracker'] in trackers)
+                    done_ratio.append(meta['done_ratio'] or 0 if meta is not None else 0)
+
+        return cells, {
+            'total_hours': numpy.array(total_hours, dtype=numpy.float64),
+            'day_of_week': numpy.array(day_of_week, dtype=numpy.int8),
+            'row_cell': numpy.array(row_cell, dtype=numpy.intp),
+            'hours': numpy.array(hours, dtype=numpy.float64),
+            'comment_length': numpy.array(comment_length, dtype=numpy.int64),
+            'comment_extra': numpy.array(comment_extra, dtype=numpy.int64),
+            'attachments': numpy.array(attachments, dtype=numpy.int64),
+            'in_issue_meta': numpy.array(in_issue_meta, dtype=bool),
+            'counted_tracker': numpy.array(counted_tracker, dtype=bool),
+            'done_ratio': numpy.array(done_ratio, dtype=numpy.float64),
+        }
+
+    def table_columns(self, table, issue_meta):
+        """
+        Same as columns, but reads the typed arrays of an EntryTable without going through dicts
+
+        :return: Tuple of the cells (user_id, day) and a dict of cell and row arrays
+        """
+
+        day_of_week = numpy.frombuffer(table.day_of_week, dtype=numpy.int8)
+        cell_user = numpy.frombuffer(table.cell_user, dtype=numpy.int64)
+        cell_day = numpy.frombuffer(table.cell_day, dtype=numpy.int64)
+        row_cell = numpy.frombuffer(table.row_cell, dtype=numpy.int64)
+        issue_ids = numpy.frombuffer(table.issue_id, dtype=numpy.int64)
+
+        # Only weekdays count, the cells of weekends and their rows are dropped
+        counted_cell = day_of_week[cell_day] < 5
+        cell_number = numpy.cumsum(counted_cell) - 1
+        counted_row = counted_cell[row_cell]
+
+        # Issue meta is looked up once per issue, not once per row
+        unique_issues, issue_of_row = numpy.unique(issue_ids[counted_row], return_inverse=True)
+        trackers = set(self.config["trackers"])
+        metas = [issue_meta.get(issue_id) for issue_id in unique_issues.tolist()]
+
+        def per_issue(values, dtype):
+            return numpy.array(values, dtype=dtype)[issue_of_row] if metas else numpy.zeros(0, dtype=dtype)
+
+        cells = [(table.user_ids[user], table.days[day])
+                 for user, day in zip(cell_user[counted_cell].tolist(), cell_day[counted_cell].tolist())]
+
+        return cells, {
+            'total_hours': numpy.frombuffer(table.total_hours, dtype=numpy.float64)[counted_cell],
+            'day_of_week': day_of_week[cell_day[counted_cell]],
+            'row_cell': cell_number[row_cell[counted_row]].astype(numpy.intp),
+            'hours': numpy.frombuffer(table.hours, dtype=numpy.float64)[counted_row],
+            'comment_length': numpy.frombuffer(table.comment_length, dtype=numpy.int64)[counted_row],
+            'comment_extra': numpy.frombuffer(table.comment_extra, dtype=numpy.int64)[counted_row],
+            'attachments': numpy.frombuffer(table.attachments, dtype=numpy.int64)[counted_row],
+            'in_issue_meta': per_issue([meta is not None for meta in metas], bool),
+            'counted_tracker': per_issue([meta is not None and meta['tracker'] in trackers for meta in metas], bool),
+            'done_ratio': per_issue([meta['done_ratio'] or 0 if meta is not None else 0 for meta in metas], numpy.float64),
+        }
+
+    def score(self, columns):
+        """
+        Computes the time and update components of every cell
+
+        :param columns: Arrays as returned by columns()
+        :return: Tuple of time components, time reasons, update components and update reasons, the
+                 components are (cells x components) arrays and reasons are arrays of the reason flags of the cells
+        """
+
+        time = self.config["time"]
+        update = self.config["update"]
+
+        cells = len(columns['total_hours'])
+        row_cell = columns['row_cell']
+
+        def per_cell(values):
+            return numpy.bincount(row_cell, weights=values, minlength=cells)
+
+        total = columns['total_hours']
+
+        # Time entries
+        issues_with_hours = per_cell(columns['hours'] > 0.0)
+        dummy_entry_suspected = 3 - numpy.minimum(3, total)
+        overtime_suspected = numpy.maximum(0, total - 8)
+
+        time_points = numpy.column_stack([
+            numpy.full(cells, float(time["default"])),
+            numpy.where(total > 0, time["for_update"], 0.0),
+            numpy.where(columns['day_of_week'] < 5, time["for_update_on_weekday"], 0.0),
+            time["for_at_least_3"] * (1 / (1 + dummy_entry_suspected)),
+            time["for_max_8"] * (1 / (1 + overtime_suspected)),
+            time["for_distibuted"] * (1 - 1 / (1 + issues_with_hours)),
+        ])
+
+        time_reasons = [
+            (gamificationengine.NO_LOGGED_TIME, (total <= 0) & (time["for_update"] > 0.0)),
+            (gamificationengine.LOGGED_ON_WEEKEND, (columns['day_of_week'] >= 5) & (time["for_update_on_weekday"] > 0.0)),
+            (gamificationengine.LOGGED_LESS_THAN_3_HOURS, (total < 3) & (time["for_at_least_3"] > 0.0)),
+            (gamificationengine.LOGGED_MORE_THAN_8_HOURS, (total > 8) & (time["for_max_8"] > 0.0)),
+            (gamificationengine.LOGGED_ON_MULTIPLE_ISSUES, (issues_with_hours > 1) & (time["for_distibuted"] > 0.0)),
+        ]
+        time_reasons = sum(flag * mask.astype(numpy.int64) for flag, mask in time_reasons)
+
+        # Updates
+        in_issue_meta = columns['in_issue_meta']
+        comment_sum = per_cell(columns['comment_length'])
+        without_done_ratio = per_cell(
+            columns['counted_tracker'] & ~(columns['done_ratio'] > 0) & (columns['hours'] > 0))
+        without_done_ratio = numpy.maximum(0, without_done_ratio - 1)
+        number_of_attachments = per_cell(numpy.where(in_issue_meta, columns['attachments'], 0))
+        formatted_comments = per_cell(numpy.where(in_issue_meta, columns['comment_extra'], 0))
+        comment_extra = numpy.maximum(0, comment_sum - 150)
+
+        update_points = numpy.column_stack([
+            numpy.full(cells, float(update["default"])),
+            numpy.where(comment_sum > 0, update["for_any_comment"], 0.0),
+            update["for_done_ratio"] * (1 / (1 + without_done_ratio)),
+            update["for_attachment"] * (1 - (1 / (1 + number_of_attachments))),
+            update["for_nice_comments"] * (1 - (1 / (1 + formatted_comments / 2))),
+            update["for_story_teller"] * (1 - (1 / (1 + number_of_attachments / 50))),
+        ])
+
+        update_reasons = [
+            (gamificationengine.NO_COMMENTS, (comment_sum <= 0) & (update["for_any_comment"] > 0)),
+            (gamificationengine.NO_DONE_RATIO, without_done_ratio > 0),
+            (gamificationengine.ATTACHED_FILES, (number_of_attachments > 0) & (update["for_attachment"] > 0.0)),
+            (gamificationengine.NICE_COMMENTS, (formatted_comments > 0) & (update["for_nice_comments"] > 0)),
+            (gamificationengine.STORY_TELLER, (comment_extra > 0) & (update["for_story_teller"] > 0.0)),
+        ]
+        update_reasons = sum(flag * mask.astype(numpy.int64) for flag, mask in update_reasons)
+
+        return time_points, time_reasons, update_points, update_reasons
+
+    def score_users(self, entry_meta, issue_meta, all_days):
+        """
+        Calculates the points of the users in the entry meta on the given days
+
+        :param entry_meta: Entry meta analyzed, either the nested dicts or an EntryTable
+        :param issue_meta: Issue meta analyzed
+        :param all_days: Days which count, see all_days()
+        :return: Dictionary with points assigned to users and days
+        """
+
+        points = dict((user_id, {}) for user_id in entry_meta)
+
+        cells, columns = self.columns(entry_meta, issue_meta, all_days)
+        time_points, time_reasons, update_points, update_reasons = self.score(columns)
+
+        time_sums = self.sum_components(time_points).tolist()
+        update_sums = self.sum_components(update_points).tolist()
+        time_reasons = time_reasons.tolist()
+        update_reasons = update_reasons.tolist()
+
+        # Millions of small dicts are made below, none of them in a reference cycle, the garbage
+        # collector would otherwise run over and over while they are made and take longer than the scoring
+        collecting = gc.isenabled()
+        gc.disable()
+
+        try:
+            self.fill_points(points, cells, time_sums, time_reasons, update_sums, update_reasons, all_days)
+        finally:
+            if collecting:
+                gc.enable()
+
+        return points
+
+    def fill_points(self, points, cells, time_sums, time_reasons, update_sums, update_reasons, all_days):
+        """Puts the sums and reasons of the scored cells into the points, and the points of being absent on the rest"""
+
+        for cell, (user_id, key) in enumerate(cells):
+            points[user_id][key] = {
+                'time_points': {
+                    'sum': time_sums[cell],
+                    'reasons': time_reasons[cell]
+                },
+                'update_points': {
+                    'sum': update_sums[cell],
+                    'reasons': update_reasons[cell]
+                }
+            }
+
+        # Only the days the users didn't log time on get the points of being absent, see absent_points()
+        absent = {
+            'time_points': {'sum': self.config["time"]["default"], 'reasons': gamificationengine.ABSENT},
+            'update_points': {'sum': self.config["update"]["default"], 'reasons': gamificationengine.ABSENT},
+        }
+
+        for days in points.values():
+            for key in all_days.difference(days):
+                days[key] = absent.copy()
+
+    @staticmethod
+    def sum_components(components):
+        """
+        Sums up the components of every cell, column by column from left to right, which are the very same
+        additions Python's sum() makes in GamificationEngine, so the sums are equal to the last bit
+
+        :param components: (cells x components) array as returned by score()
+        :return: Array of the sums of the cells
+        """
+
+        # Python 3.12 and later sum floats up with compensation, which has to be matched row by row
+        if COMPENSATED_SUM:
+            return numpy.array([sum(row) for row in components.tolist()], dtype=numpy.float64)
+
+        sums = components[:, 0].copy()
+
+        for column in range(1, components.shape[1]):
+            sums += components[:, column]
+
+        return sums
+
+    def iter_points(self, entry_meta, issue_meta):
+        """
+        Same as GamificationEngine.iter_points, but all users are scored at once up front,
+        scoring them one by one would lose the point of the array operations
+
+        :return: Generator of (user_id, points of the user) pairs in ascending user id order
+        """
+
+        points = self.calculate_points(entry_meta, issue_meta)
+
+        for user_id in sorted(points):
+            yield user_id, points.pop(user_id)
@@ -1,10 +1,13 @@
 import os
 import json
+import time
+import threading
 import requests
 from distutils.version import LooseVersion
 from redmine.version import __version__
 from redmine.managers import ResourceManager
-from redmine.utilities import is_string, to_string, json_response
+from redmine.paging import Pager
+from redmine.utilities import is_string, to_string, json_decode, DATE_FORMAT, DATETIME_FORMAT
 from redmine.exceptions import (
     AuthError,
     ConflictError,
@@ -33,10 +36,27 @@ class Redmine(object):
         self.password = kwargs.get('password', None)
         self.requests = kwargs.get('requests', {})
         self.impersonate = kwargs.get('impersonate', None)
-        self.date_format = kwargs.get('date_format', '%Y-%m-%d')
-        self.datetime_format = kwargs.get('datetime_format', '%Y-%m-%dT%H:%M:%SZ')
+        self.date_format = kwargs.get('date_format', DATE_FORMAT)
+        self.datetime_format = kwargs.get('datetime_format', DATETIME_FORMAT)
         self.raise_attr_exception = kwargs.get('raise_attr_exception', True)
         self.custom_resource_paths = kwargs.get('custom_resource_paths', None)
+        self.pool_size = kwargs.get('pool_size', 10)
+        self.concurrency = kwargs.get('concurrency', 4)
+        self.streaming = kwargs.get('streaming', False)
+        self.cache = kwargs.get('cache', None)
+        self.page_size = kwargs.get('page_size', 100)
+        self.page_sizes = kwargs.get('page_sizes', {})
+        self.page_time = kwargs.get('page_time', None)
+        self.page_bytes = kwargs.get('page_bytes', None)
+        self.pagers = {}
+        self.scheduler = kwargs.get('scheduler', None)
+        self.tracer = kwargs.get('tracer', None)
+        self.session = self._create_session()
+
+        # Limits the requests in flight at once over all threads using the instance, e.g. readers of several projects
+        max_requests = kwargs.get('max_requests', None)
+        self.request_slots = threading.BoundedSemaphore(max_requests) if max_requests else None
+        self.resource_classes = {}
 
     def __getattr__(self, resource):
         """Returns either ResourceSet or Resource object depending on the method used on the ResourceManager"""
@@ -45,6 +65,28 @@ class Redmine(object):
 
         return ResourceManager(self, resource)
 
+    def _create_session(self):
+        """Creates a keep-alive session with a connection pool shared by all requests of this instance"""
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers.update({'Accept-Encoding': 'gzip, deflate', 'Connection': 'keep-alive'})
+        return session
+
+    def pager(self, resource_name):
+        """Returns the pager sizing the pages of a resource, e.g. TimeEntry, it's shared by all of its managers"""
+        pager = self.pagers.get(resource_name)
+
+        if pager is None:
+            # Page sizes can be given for time_entry as well as TimeEntry
+            page_sizes = dict((''.join(word[0].upper() + word[1:] for word in name.split('_')), size)
+                              for name, size in self.page_sizes.items())
+            pager = self.pagers.setdefault(resource_name, Pager(
+                page_sizes.get(resource_name, self.page_size), self.page_time, self.page_bytes))
+
+        return pager
+
     def upload(self, filepath):
         """Uploads file from filepath to Redmine and returns an assigned token"""
         if self.ver is not None and LooseVersion(str(self.ver)) < LooseVersion('1.4.0'):
@@ -94,8 +136,106 @@ class Redmine(object):
         """Shortcut for the case if we just want to check if user provided valid auth credentials"""
         return self.user.get('current')
 
-    def request(self, method, url, headers=None, params=None, data=None, raw_response=False):
-        """Makes requests to Redmine and returns result in json format"""
+    def request(self, method, url, headers=None, params=None, data=None, raw_response=False, stats=None):
+        """Makes requests to Redmine and returns result in json format, the seconds and bytes it took are put into stats if given"""
+        kwargs = self.prepare_request(method, headers, params, data)
+        key, cached = self.prepare_cache(method, url, kwargs) if not raw_response else (None, None)
+
+        start, response, retries = self.send(method, url, kwargs)
+        self.trace(method, url, kwargs, start, response.status_code, len(response.content), retries, stats)
+
+        if response.status_code in (200, 201) and raw_response:
+            return response
+
+        status_code, content = response.status_code, response.content
+
+        if key is not None:
+            status_code, content = self.cache_response(key, cached, status_code, response.headers, content)
+
+        return self.process_response(response, status_code, content, lambda: json_decode(content))
+
+    def trace(self, method, url, kwargs, start, status_code, size, retries, stats):
+        """Puts the seconds, bytes and retries of a request into stats and hands them to the tracer if there is one"""
+        seconds = time.time() - start
+
+        if stats is not None:
+            stats.update(seconds=seconds, bytes=size, retries=retries)
+
+        if self.tracer is not None:
+            self.tracer.record(method, url, kwargs['params'], status_code, size, seconds, retries)
+
+    def send(self, method, url, kwargs):
+        """
+        Sends a request when the scheduler lets it, failed GETs are tried again as the scheduler decides,
+        so a transient failure costs a single request instead of everything read so far
+
+        :return: Time the last try started, its response and how many times the request was tried again
+        """
+        retries = 0
+
+        while True:
+            if self.scheduler is not None:
+                time.sleep(self.scheduler.slot(url))
+
+            start = time.time()
+
+            try:
+                if self.request_slots is not None:
+                    with self.request_slots:
+                        response = getattr(self.session, method)(url, **kwargs)
+                else:
+                    response = getattr(self.session, method)(url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                delay = self.retry_delay(method, url, retries)
+
+                if delay is None:
+                    raise
+            else:
+                delay = self.retry_delay(method, url, retries, response.status_code, response.headers)
+
+                if delay is None:
+                    return start, response, retries
+
+            time.sleep(delay)
+            retries += 1
+
+    def retry_delay(self, method, url, retries, status_code=None, headers=None):
+        """Returns how many seconds to wait before trying a request again or None if it isn't tried again"""
+        if self.scheduler is None:
+            return None
+
+        return self.scheduler.retry_delay(method, url, retries, status_code, headers)
+
+    def prepare_cache(self, method, url, kwargs):
+        """Looks up the cached response of a GET request and asks Redmine to send the response only if it changed since"""
+        if self.cache is None or method != 'get':
+            return None, None
+
+        # The API key is one of the params already, the user name is only part of the basic auth
+        key = self.cache.key(method, url, kwargs['params'], [self.username, self.impersonate])
+        cached = self.cache.get(key)
+
+        if cached is not None:
+            if cached['etag'] is not None:
+                kwargs['headers']['If-None-Match'] = cached['etag']
+            if cached['last_modified'] is not None:
+                kwargs['headers']['If-Modified-Since'] = cached['last_modified']
+
+        return key, cached
+
+    def cache_response(self, key, cached, status_code, headers, content):
+        """Stores a response in the cache or takes the cached one if Redmine reported it unchanged, returns the status code and content to process"""
+        if status_code == 304 and cached is not None:
+            self.cache.touch(key)
+            return 200, cached['content']
+
+        if status_code == 200:
+            self.cache.put(key, headers.get('ETag'), headers.get('Last-Modified'), content)
+
+        return status_code, content
+
+    def prepare_request(self, method, headers=None, params=None, data=None):
+        """Prepares headers, params, data and authentication of a request to Redmine"""
         kwargs = dict(self.requests, **{
             'headers': headers or {},
             'params': params or {},
@@ -115,36 +255,34 @@ class Redmine(object):
         else:
             kwargs['auth'] = (self.username, self.password)
 
-        print(url)
-
-        response = getattr(requests, method)(url, **kwargs)
+        return kwargs
 
-        if response.status_code in (200, 201):
-            if raw_response:
-                return response
-            elif not response.content.strip():
+    def process_response(self, response, status_code, content, decode):
+        """Returns the decoded json of a response or raises an exception matching its status code"""
+        if status_code in (200, 201):
+            if not content.strip():
                 return True
             else:
                 try:
-                    return json_response(response.json)
+                    return decode()
                 except (ValueError, TypeError):
                     raise JSONDecodeError(response)
-        elif response.status_code == 401:
+        elif status_code == 401:
             raise AuthError
-        elif response.status_code == 403:
+        elif status_code == 403:
             raise ForbiddenError
-        elif response.status_code == 404:
+        elif status_code == 404:
             raise ResourceNotFoundError
-        elif response.status_code == 409:
+        elif status_code == 409:
             raise ConflictError
-        elif response.status_code == 412 and self.impersonate is not None:
+        elif status_code == 412 and self.impersonate is not None:
             raise ImpersonateError
-        elif response.status_code == 413:
+        elif status_code == 413:
             raise RequestEntityTooLargeError
-        elif response.status_code == 422:
-            errors = json_response(response.json)['errors']
+        elif status_code == 422:
+            errors = decode()['errors']
             raise ValidationError(to_string(', '.join(e if is_string(e) else ': '.join(e) for e in errors)))
-        elif response.status_code == 500:
+        elif status_code == 500:
             raise ServerError
 
-        raise UnknownError(response.status_code)
+        raise UnknownError(status_code)
@@ -0,0 +1,264 @@
+import time
+import asyncio
+import itertools
+import collections
+import aiohttp
+from redmine import Redmine
+from redmine.managers import ResourceManager
+from redmine.resultsets import ResourceSet
+from redmine.utilities import json_decode
+from redmine.exceptions import (
+    ResourceNotFoundError,
+    ResourceRequirementsError,
+    ResourceSetNotAwaitedError
+)
+
+
+class AsyncResourceSet(ResourceSet):
+    """Represents a set of Redmine resources which are requested on an asyncio event loop"""
+    def _evaluate(self):
+        """Synchronous evaluation would block the event loop, the set has to be awaited instead"""
+        raise ResourceSetNotAwaitedError
+
+    async def _evaluate_async(self):
+        """Evaluates current AsyncResourceSet object"""
+        self.resources, self._total_count = await self.manager.retrieve(
+            limit=self.manager.params.get('limit', self.limit),
+            offset=self.manager.params.get('offset', self.offset)
+        )
+
+    def __await__(self):
+        """Evaluates the set, afterwards it can be used as a usual ResourceSet"""
+        return self._evaluated().__await__()
+
+    async def _evaluated(self):
+        if self.resources is None:
+            await self._evaluate_async()
+
+        return self
+
+    def __aiter__(self):
+        """Returns requested resources in a lazy fashion, page by page if Redmine instance was asked to stream"""
+        return self._iterate_async()
+
+    async def _iterate_async(self):
+        if self.resources is None and self.manager.redmine.streaming:
+            async for resource in self.manager.stream(
+                    limit=self.manager.params.get('limit', self.limit),
+                    offset=self.manager.params.get('offset', self.offset)):
+                yield self.manager.to_resource(resource)
+        else:
+            await self
+
+            for resource in self.resources:
+                yield self.manager.to_resource(resource)
+
+
+class AsyncResourceManager(ResourceManager):
+    """Manages the behaviour of Redmine resources requested on an asyncio event loop"""
+    resource_set_class = AsyncResourceSet
+
+    async def retrieve(self, **params):
+        """A proxy for Redmine object request which does some extra work for resource retrieval"""
+        self.params.update(**params)
+
+        limit = self.params.get('limit', 0)
+        offset = self.params.get('offset', 0)
+
+        response = await self.request_page(self.first_limit(), offset)
+
+        # A single resource was requested via get()
+        if isinstance(response[self.container], dict):
+            return response[self.container], 1
+
+        # We have to mimic limit/offset if a resource
+        # doesn't support this feature on Redmine level
+        if not self.is_paginated(response):
+            total_count = len(response[self.container])
+            results = response[self.container][offset:None if limit == 0 else limit + offset]
+            return results, total_count
+
+        total_count = response['total_count']
+        results = list(response[self.container])
+
+        for page in await self.request_pages(list(self.remaining_pages(response, offset))):
+            results.extend(page[self.container])
+
+        return results, total_count
+
+    async def stream(self, **params):
+        """Same as retrieve, but yields resources page by page while the following pages are being prefetched"""
+        self.params.update(**params)
+
+        limit = self.params.get('limit', 0)
+        offset = self.params.get('offset', 0)
+
+        response = await self.request_page(self.first_limit(), offset)
+
+        if not self.is_paginated(response):
+            for resource in response[self.container][offset:None if limit == 0 else limit + offset]:
+                yield resource
+
+            return
+
+        pages = self.remaining_pages(response, offset)
+        tasks = collections.deque(asyncio.ensure_future(self.request_page(*page))
+                                  for page in itertools.islice(pages, max(1, self.redmine.concurrency)))
+
+        try:
+            while response is not None:
+                for resource in response[self.container]:
+                    yield resource
+
+                if not tasks:
+                    break
+
+                response = await tasks.popleft()
+                page = next(pages, None)
+
+                if page is not None:
+                    tasks.append(asyncio.ensure_future(self.request_page(*page)))
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def request_page(self, limit, offset):
+        """Requests a single page of resources from Redmine"""
+        stats = {}
+
+        try:
+            response = await self.redmine.request(
+                'get', self.url, params=dict(self.params, limit=limit, offset=offset), stats=stats)
+        except ResourceNotFoundError:
+            if self.resource_class.requirements:
+                raise ResourceRequirementsError(self.resource_class.requirements)
+
+            raise ResourceNotFoundError
+
+        self.observe_page(limit, response, stats)
+        return response
+
+    async def request_pages(self, pages):
+        """Requests (limit, offset) pages concurrently and returns responses in the order of pages"""
+        semaphore = asyncio.Semaphore(max(1, self.redmine.concurrency))
+
+        async def request_page(limit, offset):
+            async with semaphore:
+                return await self.request_page(limit, offset)
+
+        return await asyncio.gather(*(request_page(limit, offset) for limit, offset in pages))
+
+    async def get(self, resource_id, **params):
+        """Returns a Resource object directly by resource id (can be either integer id or string identifier)"""
+        self.prepare_get(resource_id, params)
+        return self.resource_class(self, (await self.retrieve())[0])
+
+
+class AsyncRedmine(Redmine):
+    """An entry point for requests made on an asyncio event loop
+
+    Offers the reading part of the Redmine interface, i.e. get(), all() and filter(), over
+    an aiohttp connection pool. Lazy loading of relations and includes of the resources
+    isn't available, they should be requested up front with include.
+    """
+    def __getattr__(self, resource):
+        """Returns either AsyncResourceSet or Resource object depending on the method used on the manager"""
+        if resource.startswith('_'):
+            raise AttributeError
+
+        return AsyncResourceManager(self, resource)
+
+    def _create_session(self):
+        """The aiohttp session has to be created on the running event loop, so it's deferred to the first request"""
+        return None
+
+    async def request(self, method, url, headers=None, params=None, data=None, raw_response=False, stats=None):
+        """Makes requests to Redmine and returns result in json format, the seconds and bytes it took are put into stats if given"""
+        kwargs = self.prepare_request(method, headers, params, data)
+        key, cached = None, None
+
+        # The cache reads and writes files, which would block the event loop
+        if self.cache is not None and not raw_response:
+            key, cached = await asyncio.get_event_loop().run_in_executor(None, self.prepare_cache, method, url, kwargs)
+
+        if self.session is None:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                headers={'Accept-Encoding': 'gzip, deflate'}
+            )
+
+        options = {
+            'headers': kwargs['headers'],
+            # aiohttp accepts only strings and numbers as query values
+            'params': dict((name, value if isinstance(value, (int, float)) and not isinstance(value, bool)
+                            else str(value)) for name, value in kwargs['params'].items()),
+        }
+
+        if kwargs['data']:
+            options['data'] = kwargs['data']
+
+        if 'auth' in kwargs:
+            options['auth'] = aiohttp.BasicAuth(*kwargs['auth'])
+
+        if kwargs.get('verify', True) is False:
+            options['ssl'] = False
+
+        if kwargs.get('timeout') is not None:
+            options['timeout'] = aiohttp.ClientTimeout(total=kwargs['timeout'])
+
+        start, response, content, retries = await self.send(method, url, options)
+        self.trace(method, url, kwargs, start, response.status, len(content), retries, stats)
+
+        if response.status in (200, 201) and raw_response:
+            return content
+
+        status = response.status
+
+        if key is not None:
+            status, content = await asyncio.get_event_loop().run_in_executor(
+                None, self.cache_response, key, cached, status, response.headers, content)
+
+        return self.process_response(response, status, content, lambda: json_decode(content))
+
+    async def send(self, method, url, options):
+        """
+        Sends a request when the scheduler lets it, failed GETs are tried again as the scheduler decides
+
+        :return: Time the last try started, its response, the content and how many times the request was tried again
+        """
+        retries = 0
+
+        while True:
+            if self.scheduler is not None:
+                await asyncio.sleep(self.scheduler.slot(url))
+
+            start = time.time()
+
+            try:
+                async with self.session.request(method.upper(), url, **options) as response:
+                    content = await response.read()
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                delay = self.retry_delay(method, url, retries)
+
+                if delay is None:
+                    raise
+            else:
+                delay = self.retry_delay(method, url, retries, response.status, response.headers)
+
+                if delay is None:
+                    return start, response, content, retries
+
+            await asyncio.sleep(delay)
+            retries += 1
+
+    async def close(self):
+        """Closes the connection pool"""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
@@ -0,0 +1,138 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+
+
+class ResponseCache(object):
+    """
+    On-disk cache of Redmine responses, revalidated with the ETag and Last-Modified validators
+    the server sent, so unchanged resources cost a 304 without a body instead of a full transfer
+    """
+
+    def __init__(self, directory, max_size=64 * 1024 * 1024, ttl=7 * 24 * 60 * 60):
+        """
+        Opens (and creates if necessary) the cache
+
+        :param directory: Directory to keep the responses in, e.g. .redmine-cache
+        :param max_size: How many bytes the cached responses may take, the least recently used ones are evicted beyond
+        :param ttl: How many seconds a response is kept after it was last stored or revalidated
+        """
+        self.directory = directory
+        self.max_size = max_size
+        self.ttl = ttl
+        self.lock = threading.Lock()
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        self.sizes = {}
+
+        for name in os.listdir(directory):
+            if name.endswith('.cache'):
+                self.sizes[name] = os.path.getsize(os.path.join(directory, name))
+
+        self.size = sum(self.sizes.values())
+
+    @staticmethod
+    def key(method, url, params, identity=None):
+        """
+        Returns the cache key of a request, the order of the params doesn't matter
+
+        :param identity: Who the request is made as, e.g. the user name, users sharing the cache
+                         don't get responses made for each other, private issues differ between them
+        """
+        request = json.dumps([method.lower(), url, sorted((str(name), str(value)) for name, value in params.items()),
+                              identity])
+        return hashlib.sha1(request.encode('utf-8')).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + '.cache')
+
+    def get(self, key):
+        """
+        Returns the cached response of a request
+
+        :return: Dictionary of the "etag", "last_modified" and "content" of the response or None if
+                 it isn't cached or it expired
+        """
+        try:
+            # The modification time of the file tells when the response was stored or revalidated last
+            if os.path.getmtime(self.path(key)) + self.ttl < time.time():
+                self.remove(key + '.cache')
+                return None
+
+            with open(self.path(key), 'rb') as stream:
+                meta = json.loads(stream.readline().decode('utf-8'))
+                content = stream.read()
+        except (IOError, OSError, ValueError):
+            return None
+
+        return dict(meta, content=content)
+
+    def put(self, key, etag, last_modified, content):
+        """Stores the response of a request, evicting the least recently used ones if the cache grows too large"""
+        if etag is None and last_modified is None or len(content) > self.max_size:
+            return
+
+        meta = json.dumps({'etag': etag, 'last_modified': last_modified}).encode('utf-8')
+
+        # Written to a temporary file first, concurrent readers never see a partial response
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(descriptor, 'wb') as stream:
+            stream.write(meta + b'\n')
+            stream.write(content)
+        getattr(os, 'replace', os.rename)(temporary, self.path(key))
+
+        name = key + '.cache'
+        size = len(meta) + 1 + len(content)
+
+        with self.lock:
+            self.size += size - self.sizes.get(name, 0)
+            self.sizes[name] = size
+
+        if self.size > self.max_size:
+            self.evict()
+
+    def touch(self, key):
+        """Renews a response the server reported as unchanged"""
+        try:
+            os.utime(self.path(key), None)
+        except OSError:
+            pass
+
+    def evict(self):
+        """Removes the least recently stored responses until the cache fits into max_size"""
+        with self.lock:
+            names = list(self.sizes)
+
+        def stored(name):
+            try:
+                return os.path.getmtime(os.path.join(self.directory, name))
+            except OSError:
+                return 0
+
+        for name in sorted(names, key=stored):
+            if self.size <= self.max_size:
+                break
+
+            self.remove(name)
+
+    def remove(self, name):
+        try:
+            os.remove(os.path.join(self.directory, name))
+        except OSError:
+            pass
+
+        with self.lock:
+            self.size -= self.sizes.pop(name, 0)
+
+    def clear(self):
+        """Removes every cached response"""
+        with self.lock:
+            names = list(self.sizes)
+
+        for name in names:
+            self.remove(name)
@@ -134,6 +134,14 @@ class ResultSetTotalCountError(BaseRedmineError):
         super(ResultSetTotalCountError, self).__init__('Total count is unknown before evaluation')
 
 
+class ResourceSetNotAwaitedError(BaseRedmineError):
+    """Asynchronous ResourceSet has to be awaited before it can be used synchronously"""
+    def __init__(self):
+        super(ResourceSetNotAwaitedError, self).__init__(
+            'Asynchronous resource set has to be awaited or iterated with async for before it can be used'
+        )
+
+
 class CustomFieldValueError(BaseRedmineError):
     """Custom fields should be passed as a list of dictionaries"""
     def __init__(self):
@@ -1,4 +1,7 @@
 import datetime
+import itertools
+import collections
+from concurrent.futures import ThreadPoolExecutor
 from distutils.version import LooseVersion
 from redmine.resultsets import ResourceSet
 from redmine.utilities import MemorizeFormatter
@@ -20,93 +23,180 @@ class ResourceManager(object):
     url = ''
     params = {}
     container = None
+    resource_set_class = ResourceSet
 
     def __init__(self, redmine, resource_name):
         """Accepts redmine instance object and tries to import the needed resource by resource name"""
-        resource_class = None
         resource_name = ''.join(word[0].upper() + word[1:] for word in resource_name.split('_'))
-        resource_paths = tuple((redmine.custom_resource_paths or ())) + ('redmine.resources',)
+        self.pager = redmine.pager(resource_name)
 
-        for path in resource_paths:
-            try:
-                resource_class = getattr(__import__(path, fromlist=[resource_name]), resource_name)
-                break
-            except (ImportError, AttributeError):
-                continue
+        # Resolved resource classes are remembered by the Redmine instance,
+        # so the import and version check only run once per resource name
+        resource_class = redmine.resource_classes.get(resource_name)
 
         if resource_class is None:
-            raise ResourceError
+            resource_paths = tuple((redmine.custom_resource_paths or ())) + ('redmine.resources',)
 
-        if redmine.ver is not None and LooseVersion(str(redmine.ver)) < LooseVersion(resource_class.redmine_version):
-            raise ResourceVersionMismatchError
+            for path in resource_paths:
+                try:
+                    resource_class = getattr(__import__(path, fromlist=[resource_name]), resource_name)
+                    break
+                except (ImportError, AttributeError):
+                    continue
+
+            if resource_class is None:
+                raise ResourceError
+
+            if redmine.ver is not None and LooseVersion(str(redmine.ver)) < LooseVersion(resource_class.redmine_version):
+                raise ResourceVersionMismatchError
+
+            redmine.resource_classes[resource_name] = resource_class
 
         self.redmine = redmine
         self.resource_class = resource_class
 
+        # The class attribute would be shared, and changed by retrieve(), by all managers
+        self.params = {}
+
     def retrieve(self, **params):
         """A proxy for Redmine object request which does some extra work for resource retrieval"""
         self.params.update(**params)
 
-        results = []
-        total_count = 0
         limit = self.params.get('limit', 0)
         offset = self.params.get('offset', 0)
 
-        if limit == 0:
-            limit = 100
-
-        while True:
-            try:
-                response = self.redmine.request('get', self.url, params=dict(self.params, limit=limit, offset=offset))
-            except ResourceNotFoundError:
-                # This is the only place we're checking for ResourceRequirementsError
-                # because for some POST/PUT/DELETE requests Redmine may also return 404
-                # status code instead of 405 which can lead us to improper decisions
-                if self.resource_class.requirements:
-                    raise ResourceRequirementsError(self.resource_class.requirements)
-
-                raise ResourceNotFoundError
-
-            # A single resource was requested via get()
-            if isinstance(response[self.container], dict):
-                results = response[self.container]
-                total_count = 1
-                break
-
-            # Resource supports limit/offset on Redmine level
-            if all(response.get(param) is not None for param in ('total_count', 'limit', 'offset')):
-                total_count = response['total_count']
-                results.extend(response[self.container])
-
-                # We want to get all resources
-                if self.params.get('limit', 0) == 0:
-                    offset += limit
-
-                    if total_count <= offset:
-                        break
-                # We want to get only some resources
-                else:
-                    limit -= 100
-                    offset += 100
-
-                    if limit <= 0:
-                        break
-            # We have to mimic limit/offset if a resource
-            # doesn't support this feature on Redmine level
-            else:
-                total_count = len(response[self.container])
-                results = response[self.container][offset:None if self.params.get('limit', 0) == 0 else limit + offset]
-                break
+        response = self.request_page(self.first_limit(), offset)
+
+        # A single resource was requested via get()
+        if isinstance(response[self.container], dict):
+            return response[self.container], 1
+
+        # We have to mimic limit/offset if a resource
+        # doesn't support this feature on Redmine level
+        if not self.is_paginated(response):
+            total_count = len(response[self.container])
+            results = response[self.container][offset:None if limit == 0 else limit + offset]
+            return results, total_count
+
+        # Resource supports limit/offset on Redmine level, now that we know
+        # total_count the rest of the pages can be requested all at once
+        total_count = response['total_count']
+        results = list(response[self.container])
+
+        for page in self.request_pages(list(self.remaining_pages(response, offset))):
+            results.extend(page[self.container])
 
         return results, total_count
 
+    def stream(self, **params):
+        """Same as retrieve, but yields resources page by page while the following pages are being prefetched"""
+        self.params.update(**params)
+
+        limit = self.params.get('limit', 0)
+        offset = self.params.get('offset', 0)
+
+        response = self.request_page(self.first_limit(), offset)
+
+        if not self.is_paginated(response):
+            for resource in response[self.container][offset:None if limit == 0 else limit + offset]:
+                yield resource
+
+            return
+
+        pages = self.remaining_pages(response, offset)
+        window = max(1, self.redmine.concurrency)
+
+        # Up to concurrency pages are downloaded at once like in retrieve, but no more than that are
+        # held in memory, however many pages the resources span, each page is planned when it's requested
+        with ThreadPoolExecutor(max_workers=window) as executor:
+            futures = collections.deque(
+                executor.submit(self.request_page, *page) for page in itertools.islice(pages, window))
+
+            while response is not None:
+                for resource in response[self.container]:
+                    yield resource
+
+                if not futures:
+                    break
+
+                response = futures.popleft().result()
+                page = next(pages, None)
+
+                if page is not None:
+                    futures.append(executor.submit(self.request_page, *page))
+
+    def request_page(self, limit, offset):
+        """Requests a single page of resources from Redmine"""
+        stats = {}
+
+        try:
+            response = self.redmine.request(
+                'get', self.url, params=dict(self.params, limit=limit, offset=offset), stats=stats)
+        except ResourceNotFoundError:
+            # This is the only place we're checking for ResourceRequirementsError
+            # because for some POST/PUT/DELETE requests Redmine may also return 404
+            # status code instead of 405 which can lead us to improper decisions
+            if self.resource_class.requirements:
+                raise ResourceRequirementsError(self.resource_class.requirements)
+
+            raise ResourceNotFoundError
+
+        self.observe_page(limit, response, stats)
+        return response
+
+    def observe_page(self, limit, response, stats):
+        """Lets the pager take the latency and size of a page into account"""
+        if isinstance(response, dict) and isinstance(response.get(self.container), list):
+            self.pager.observe(limit, response.get('limit'), len(response[self.container]),
+                               stats.get('seconds', 0), stats.get('bytes', 0))
+
+    def request_pages(self, pages):
+        """Requests (limit, offset) pages concurrently and returns responses in the order of pages"""
+        workers = min(self.redmine.concurrency, len(pages))
+
+        if workers <= 1:
+            return [self.request_page(limit, offset) for limit, offset in pages]
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(lambda page: self.request_page(*page), pages))
+
+    @staticmethod
+    def is_paginated(response):
+        """Checks whether Redmine supports limit/offset for the resource the response belongs to"""
+        return all(response.get(param) is not None for param in ('total_count', 'limit', 'offset'))
+
+    def first_limit(self):
+        """Returns how many resources to request with the first page"""
+        limit = self.params.get('limit', 0)
+        return self.pager.size if limit == 0 else min(limit, self.pager.size)
+
+    def remaining_pages(self, response, offset):
+        """
+        Yields (limit, offset) pairs of the pages following the first response, which was requested at offset,
+        the size of each page is taken from the pager when the page is planned, so it follows the pages seen meanwhile
+        """
+        limit = self.params.get('limit', 0)
+        end = response['total_count'] if limit == 0 else min(response['total_count'], offset + limit)
+        offset += response['limit']
+
+        while offset < end:
+            # Redmine tells the limit it applied, which may be lower than the requested one,
+            # the following pages aren't made larger than that, it's unknown whether Redmine would serve them
+            size = min(self.pager.size, response['limit'], end - offset)
+            yield size, offset
+            offset += size
+
     def to_resource(self, resource):
         """Converts a single resource dict from Redmine result set to resource object"""
         return self.resource_class(self, resource)
 
+    def to_readonly_resource(self, resource):
+        """Converts a single resource dict from Redmine result set to compact read-only resource object"""
+        return self.resource_class.readonly_class()(self, resource)
+
     def to_resource_set(self, resources):
         """Converts an iterable with resource dicts from Redmine result set to ResourceSet object"""
-        return ResourceSet(self, resources)
+        return self.resource_set_class(self, resources)
 
     def new(self):
         """Returns new empty resource"""
@@ -114,6 +204,11 @@ class ResourceManager(object):
 
     def get(self, resource_id, **params):
         """Returns a Resource object directly by resource id (can be either integer id or string identifier)"""
+        self.prepare_get(resource_id, params)
+        return self.resource_class(self, self.retrieve()[0])
+
+    def prepare_get(self, resource_id, params):
+        """Sets url, params and container for requesting a single resource by resource id"""
         if self.resource_class.query_one is None or self.resource_class.container_one is None:
             raise ResourceBadMethodError
 
@@ -124,7 +219,6 @@ class ResourceManager(object):
 
         self.params = self.prepare_params(params)
         self.container = self.resource_class.container_one
-        return self.resource_class(self, self.retrieve()[0])
 
     def all(self, **params):
         """Returns a ResourceSet object with all Resource objects"""
@@ -134,7 +228,7 @@ class ResourceManager(object):
         self.url = '{0}{1}'.format(self.redmine.url, self.resource_class.query_all)
         self.params = self.prepare_params(params)
         self.container = self.resource_class.container_all
-        return ResourceSet(self)
+        return self.resource_set_class(self)
 
     def filter(self, **filters):
         """Returns a ResourceSet object with Resource objects filtered by a dict of filters"""
@@ -151,7 +245,7 @@ class ResourceManager(object):
             raise ResourceFilterError
 
         self.params = self.prepare_params(filters)
-        return ResourceSet(self)
+        return self.resource_set_class(self)
 
     def create(self, **fields):
         """Creates a new resource in Redmine database and returns resource object on success"""
@@ -0,0 +1,64 @@
+import threading
+
+
+class Pager(object):
+    """
+    Chooses how many resources to request per page, either a fixed number or, given a target
+    page time, one that grows or shrinks with the latency and size of the pages seen so far
+    """
+
+    def __init__(self, size=100, page_time=None, page_bytes=None, minimum=10, maximum=1000):
+        """
+        :param size: Page size to start with, it stays this way unless page_time or page_bytes is given
+        :param page_time: How many seconds a page should take, None for no target
+        :param page_bytes: How many bytes a page should have at most, None for no limit
+        :param minimum: Smallest page size to adapt to
+        :param maximum: Largest page size to adapt to, lowered to the limit Redmine applies if that's smaller
+        """
+        self.size = size
+        self.page_time = page_time
+        self.page_bytes = page_bytes
+        self.minimum = minimum
+        self.maximum = maximum
+        self.seconds_per_resource = None
+        self.bytes_per_resource = None
+        self.lock = threading.Lock()
+
+    def observe(self, limit, served_limit, count, seconds, size):
+        """
+        Takes a page into account for the following ones
+
+        :param limit: How many resources were requested
+        :param served_limit: How many resources Redmine was willing to return, i.e. the limit of the response
+        :param count: How many resources the page held
+        :param seconds: How long the page took
+        :param size: How many bytes the page had
+        """
+        with self.lock:
+            # Redmine caps the limit at its own maximum, pages larger than that would leave gaps
+            if served_limit is not None and served_limit < limit:
+                self.maximum = max(1, served_limit)
+                self.size = min(self.size, self.maximum)
+
+            if self.page_time is None and self.page_bytes is None or count == 0:
+                return
+
+            self.seconds_per_resource = self.average(self.seconds_per_resource, float(seconds) / count)
+            self.bytes_per_resource = self.average(self.bytes_per_resource, float(size) / count)
+
+            target = float(self.maximum)
+
+            if self.page_time is not None:
+                target = self.page_time / max(self.seconds_per_resource, 1e-6)
+
+            if self.page_bytes is not None:
+                target = min(target, self.page_bytes / max(self.bytes_per_resource, 1.0))
+
+            # At most doubled or halved at once, a single slow page shouldn't swing it too far
+            target = max(self.size // 2, min(self.size * 2, int(target)))
+            self.size = max(min(self.minimum, self.maximum), min(self.maximum, target))
+
+    @staticmethod
+    def average(previous, value):
+        """Exponentially weighted moving average, recent pages count the most"""
+        return value if previous is None else 0.7 * previous + 0.3 * value
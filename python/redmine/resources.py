@@ -1,6 +1,6 @@
 from datetime import datetime
 from distutils.version import LooseVersion
-from redmine.utilities import to_string
+from redmine.utilities import to_string, to_date
 from redmine.managers import ResourceManager
 from redmine.exceptions import (
     ValidationError,
@@ -93,6 +93,37 @@ _RESOURCE_MULTIPLE_ATTR_ID_MAP = {
 }
 
 
+# Compact read-only counterparts of the resource classes, see _Resource.readonly_class()
+_READONLY_CLASSES = {}
+
+
+def _convert_date(resource, item, value):
+    """If value is a date/datetime string converts it to the appropriate object, otherwise returns it as it is
+
+    Converted values are memorized in the _dates dict of the resource together with the
+    string they were made of, so they are only converted again if the attribute changes.
+    """
+    dates = resource._dates
+
+    if dates is not None:
+        converted = dates.get(item)
+
+        if converted is not None and converted[0] is value:
+            return converted[1]
+
+    converted = to_date(value, resource.manager.redmine.date_format, resource.manager.redmine.datetime_format)
+
+    if converted is None:
+        return value
+
+    if dates is None:
+        dates = {}
+        object.__setattr__(resource, '_dates', dates)
+
+    dates[item] = (value, converted)
+    return converted
+
+
 class _Resource(object):
     """Implementation of Redmine resource"""
     redmine_version = None
@@ -116,6 +147,8 @@ class _Resource(object):
     _members = ('manager',)
     _create_readonly = ('id', 'created_on', 'updated_on', 'author', 'user', 'project', 'issue')
     _update_readonly = _create_readonly
+    _special_attributes = ()  # attributes with a conversion of their own in __getattr__ of the resource
+    _dates = None  # converted date/datetime attributes, see _convert_date()
     __length_hint__ = None  # fixes Python 2.6 list() call on resource object
 
     def __init__(self, manager, attributes):
@@ -172,16 +205,7 @@ class _Resource(object):
                 return getattr(self, item)
 
         try:
-            # If the requested item is a date/datetime string
-            # we need to convert it to the appropriate object
-            possible_dt = str(self._attributes[item])
-
-            try:
-                return datetime.strptime(possible_dt, self.manager.redmine.datetime_format)
-            except ValueError:
-                return datetime.strptime(possible_dt, self.manager.redmine.date_format).date()
-        except ValueError:
-            return self._attributes[item]
+            value = self._attributes[item]
         except KeyError:
             if self.is_new():
                 if item in ('id', 'version'):
@@ -190,6 +214,8 @@ class _Resource(object):
 
             return self._action_if_attribute_absent()
 
+        return _convert_date(self, item, value)
+
     def __setattr__(self, item, value):
         """Sets the requested attribute"""
         if item in self._members or item.startswith('_'):
@@ -264,6 +290,21 @@ class _Resource(object):
         """Translates internal param names to the real Redmine param names if needed"""
         return params
 
+    @classmethod
+    def readonly_class(cls):
+        """Returns compact read-only counterpart of the resource class, it is created on the first call"""
+        try:
+            return _READONLY_CLASSES[cls]
+        except KeyError:
+            _READONLY_CLASSES[cls] = type('Readonly{0}'.format(cls.__name__), (_ReadonlyResource,), {
+                '__slots__': (),
+                'resource_class': cls,
+                '_unconvertible': frozenset(cls._unconvertible),
+                '_special_attributes': frozenset(cls._special_attributes),
+            })
+
+            return _READONLY_CLASSES[cls]
+
     @property
     def url(self):
         """Returns full url to the resource for humans if there is one"""
@@ -321,6 +362,87 @@ class _Resource(object):
         )
 
 
+class _ReadonlyResource(object):
+    """Compact read-only implementation of Redmine resource for reading large result sets
+
+    Wraps the resource dict as it came from Redmine without copying it or keeping any
+    bookkeeping for changes. Everything a plain attribute read can't answer, e.g. lazy
+    loading of includes and relations, is delegated to a full resource object.
+    """
+    __slots__ = ('manager', '_attributes', '_dates')
+
+    resource_class = None
+    _unconvertible = frozenset()
+    _special_attributes = frozenset()
+
+    def __init__(self, manager, attributes):
+        """Accepts manager instance object and resource attributes dict"""
+        object.__setattr__(self, 'manager', manager)
+        object.__setattr__(self, '_attributes', attributes)
+        object.__setattr__(self, '_dates', None)
+
+    def __getattr__(self, item):
+        """Returns the requested attribute and makes a conversion if needed"""
+        if item.startswith('_'):
+            raise AttributeError
+
+        if item not in self._attributes or item in self._special_attributes:
+            return getattr(self.to_resource(), item)
+
+        value = self._attributes[item]
+
+        if item in self._unconvertible:
+            return value
+        elif item in _RESOURCE_MAP:
+            return ResourceManager(self.manager.redmine, _RESOURCE_MAP[item]).to_readonly_resource(value)
+        elif item in _RESOURCE_SET_MAP and value is not None:
+            return ResourceManager(self.manager.redmine, _RESOURCE_SET_MAP[item]).to_resource_set(value).readonly()
+
+        return _convert_date(self, item, value)
+
+    def __setattr__(self, item, value):
+        """Read-only resources can't be changed"""
+        raise ReadonlyAttrError
+
+    def __getitem__(self, item):
+        """Provides a dictionary-like access to resource attributes"""
+        return getattr(self, item)
+
+    def to_resource(self):
+        """Returns a full resource object with the same attributes"""
+        return self.resource_class(self.manager, self._attributes)
+
+    @property
+    def url(self):
+        """Returns full url to the resource for humans if there is one"""
+        return self.to_resource().url
+
+    @property
+    def internal_id(self):
+        """Returns identifier of the resource for usage in internals of the library"""
+        return self.to_resource().internal_id
+
+    def __dir__(self):
+        """We need to show only real Redmine resource attributes on dir() call"""
+        return list(self._attributes.keys())
+
+    def __iter__(self):
+        """Provides a way to iterate through resource attributes and its values"""
+        return iter(self._attributes.items())
+
+    def __int__(self):
+        """Integer representation of the Redmine resource object"""
+        return int(self.to_resource())
+
+    def __str__(self):
+        """Informal representation of the Redmine resource object"""
+        return str(self.to_resource())
+
+    def __repr__(self):
+        """Official representation of the Redmine resource object"""
+        return repr(self.to_resource())
+
+
 class Project(_Resource):
     redmine_version = '1.0'
     container_all = 'projects'
@@ -348,6 +470,7 @@ class Project(_Resource):
     )
     _unconvertible = _Resource._unconvertible + ('identifier', 'status')
     _update_readonly = _Resource._update_readonly + ('identifier',)
+    _special_attributes = ('parent', 'enabled_modules')
 
     def __getattr__(self, item):
         if item == 'parent' and item in self._attributes:
@@ -380,6 +503,7 @@ class Issue(_Resource):
     _unconvertible = _Resource._unconvertible + ('subject', 'notes')
     _create_readonly = _Resource._create_readonly + ('spent_hours',)
     _update_readonly = _create_readonly
+    _special_attributes = ('parent',)
 
     class Watcher:
         """An issue watcher implementation"""
@@ -551,6 +675,7 @@ class WikiPage(_Resource):
     _unconvertible = _Resource._unconvertible + ('title', 'text')
     _create_readonly = _Resource._create_readonly + ('version',)
     _update_readonly = _create_readonly
+    _special_attributes = ('parent',)
 
     def refresh(self, **params):
         return super(WikiPage, self).refresh(**dict(params, project_id=self.manager.params.get('project_id', 0)))
@@ -835,6 +960,8 @@ class CustomField(_Resource):
     container_all = 'custom_fields'
     query_all = '/custom_fields.json'
 
+    _special_attributes = ('trackers',)
+
     @property
     def url(self):
         return '{0}/custom_fields/{1}/edit'.format(self.manager.redmine.url, self.internal_id)
@@ -862,6 +989,8 @@ class Note(_Resource):
     container_one = 'note'
     query_one = '/notes/{0}.json'
 
+    _special_attributes = ('source',)
+
     def __getattr__(self, item):
         if item == 'source' and item in self._attributes and self._attributes[item].get('type') in ('Deal', 'Contact'):
             manager = ResourceManager(self.manager.redmine, self._attributes[item]['type'])
@@ -897,6 +1026,7 @@ class Contact(_Resource):
 
     _includes = ('notes', 'contacts', 'deals', 'issues')
     _unconvertible = _Resource._unconvertible + ('company', 'skype_name')
+    _special_attributes = ('project', 'phones', 'emails', 'avatar')
 
     class Project:
         """A contact project implementation"""
@@ -1033,6 +1163,7 @@ class Deal(_Resource):
     query_delete = '/deals/{0}.json'
 
     _includes = ('notes',)
+    _special_attributes = ('category', 'status')
 
     def __getattr__(self, item):
         if item in ('category', 'status') and item in self._attributes:
@@ -62,6 +62,12 @@ class ResourceSet(object):
         """Returns ValuesResourceSet object which represents Resource as a dictionary"""
         return ValuesResourceSet(self.manager, resources=self.resources, fields=fields)
 
+    def readonly(self):
+        """Returns ReadonlyResourceSet object which represents Resource as a compact read-only object"""
+        resource_set = ReadonlyResourceSet(self.manager, resources=self.resources)
+        resource_set.limit, resource_set.offset = self.limit, self.offset
+        return resource_set
+
     @property
     def total_count(self):
         """Returns total count of available resources, this is known only after ResourceSet evaluation"""
@@ -73,6 +79,19 @@ class ResourceSet(object):
 
         return self._total_count
 
+    def _iterate(self):
+        """Iterates over resource dicts, streaming them page by page if Redmine instance was asked to"""
+        if self.resources is None and self.manager.redmine.streaming:
+            return self.manager.stream(
+                limit=self.manager.params.get('limit', self.limit),
+                offset=self.manager.params.get('offset', self.offset)
+            )
+
+        if self.resources is None:
+            self._evaluate()
+
+        return iter(self.resources)
+
     def _evaluate(self):
         """Evaluates current ResourceSet object"""
         self.resources, self._total_count = self.manager.retrieve(
@@ -97,14 +116,17 @@ class ResourceSet(object):
 
     def __iter__(self):
         """Returns requested resources in a lazy fashion"""
+        return (self.manager.to_resource(resource) for resource in self._iterate())
+
+    def __len__(self):
+        """
+        Allows len() to be called on an instance object, the resources are retrieved once and
+        kept even if the Redmine instance streams, so iterating afterwards doesn't request them again
+        """
         if self.resources is None:
             self._evaluate()
 
-        return (self.manager.to_resource(resource) for resource in self.resources)
-
-    def __len__(self):
-        """Allows len() to be called on an instance object"""
-        return sum(1 for _ in self)
+        return len(self.resources)
 
     def __repr__(self):
         """Official representation of ResourceSet object"""
@@ -166,10 +188,7 @@ class ValuesResourceSet(ResourceSet):
 
     def __iter__(self):
         """Returns requested resources in a lazy fashion"""
-        if self.resources is None:
-            self._evaluate()
-
-        for resource in self.resources:
+        for resource in self._iterate():
             if not self.fields:
                 yield resource
             else:
@@ -180,3 +199,11 @@ class ValuesResourceSet(ResourceSet):
                         fields.update({field: resource[field]})
 
                 yield fields
+
+
+class ReadonlyResourceSet(ResourceSet):
+    """Represents a set of Redmine resources as compact read-only objects, suitable for reading lots of them"""
+    def __iter__(self):
+        """Returns requested resources in a lazy fashion"""
+        readonly_class = self.manager.resource_class.readonly_class()
+        return (readonly_class(self.manager, resource) for resource in self._iterate())
@@ -0,0 +1,96 @@
+import time
+import random
+import threading
+from email.utils import parsedate_tz, mktime_tz
+
+try:
+    from urlparse import urlsplit
+except ImportError:
+    from urllib.parse import urlsplit
+
+
+class Scheduler(object):
+    """
+    Paces the requests to each host and decides when failed requests are tried again, only GETs are
+    retried as they are idempotent, with jittered exponential backoff or as long as Redmine asks in Retry-After
+    """
+
+    retry_statuses = (429, 500, 502, 503, 504)
+
+    def __init__(self, retries=5, backoff=0.5, max_backoff=60, rate=None, max_retry_after=None):
+        """
+        :param retries: How many times a GET is tried again before its failure is raised
+        :param backoff: Seconds to wait at most before the first retry, doubled with every further one
+        :param max_backoff: Seconds to wait at most before a retry Redmine didn't ask to hold off with Retry-After
+        :param rate: How many requests per second to send to a host at most, None for no limit
+        :param max_retry_after: Seconds to hold off at most when Redmine asks for longer in Retry-After, None
+                                to always wait as long as asked
+        """
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.rate = rate
+        self.max_retry_after = max_retry_after
+        self.next_slots = {}
+        self.lock = threading.Lock()
+
+    def slot(self, url):
+        """Reserves the next slot of the host of the url and returns how many seconds to wait for it"""
+        host = urlsplit(url).netloc
+
+        with self.lock:
+            now = time.time()
+            start = max(now, self.next_slots.get(host, now))
+            self.next_slots[host] = start + (1.0 / self.rate if self.rate else 0)
+
+        return start - now
+
+    def retry_delay(self, method, url, attempt, status_code=None, headers=None):
+        """
+        Decides whether a failed request is tried again
+
+        :param attempt: How many times the request was tried again already
+        :param status_code: Status code of the response, None if no response arrived
+        :param headers: Headers of the response
+        :return: Seconds to wait before trying again or None if the failure is final
+        """
+        if method != 'get' or attempt >= self.retries:
+            return None
+
+        if status_code is not None and status_code not in self.retry_statuses:
+            return None
+
+        retry_after = self.retry_after((headers or {}).get('Retry-After'))
+
+        if retry_after is not None and status_code in (429, 503):
+            # Redmine is shedding load, every request to the host holds off, the next slot() waits for it
+            self.pause(url, retry_after)
+            return 0
+
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def pause(self, url, seconds):
+        """Holds off all requests to the host of the url for the given seconds"""
+        host = urlsplit(url).netloc
+
+        with self.lock:
+            self.next_slots[host] = max(self.next_slots.get(host, 0), time.time() + seconds)
+
+    def retry_after(self, value):
+        """Returns the seconds of a Retry-After header, which is either a number of seconds or an HTTP date"""
+        if value is None:
+            return None
+
+        try:
+            seconds = float(value)
+        except ValueError:
+            date = parsedate_tz(value)
+
+            if date is None:
+                return None
+
+            seconds = mktime_tz(date) - time.time()
+
+        seconds = max(0.0, seconds)
+
+        return seconds if self.max_retry_after is None else min(self.max_retry_after, seconds)
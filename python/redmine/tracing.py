@@ -0,0 +1,137 @@
+import re
+import json
+import time
+import logging
+import threading
+
+try:
+    from urlparse import urlsplit
+except ImportError:
+    from urllib.parse import urlsplit
+
+
+class Tracer(object):
+    """Records the method, url, status, bytes, latency and retries of every request and hands them to its sinks"""
+
+    def __init__(self, *sinks):
+        """
+        :param sinks: Objects with a record(trace) method, e.g. LogSink, JsonLinesSink or HistogramSink
+        """
+        self.sinks = sinks
+
+    def record(self, method, url, params, status, size, seconds, retries):
+        """
+        Hands the trace of a request to the sinks
+
+        :param params: Query parameters of the request, the API key is left out of the trace
+        :param status: Status code of the response
+        :param size: How many bytes the response had
+        :param seconds: How long the last try of the request took
+        :param retries: How many times the request was tried again
+        """
+        trace = {
+            'time': time.time(),
+            'method': method.upper(),
+            'url': url,
+            'params': dict((name, value) for name, value in (params or {}).items() if name != 'key'),
+            'status': status,
+            'bytes': size,
+            'seconds': seconds,
+            'retries': retries
+        }
+
+        for sink in self.sinks:
+            sink.record(trace)
+
+    def close(self):
+        """Closes the sinks which hold resources"""
+        for sink in self.sinks:
+            close = getattr(sink, 'close', None)
+
+            if close is not None:
+                close()
+
+
+class LogSink(object):
+    """Logs a line per request"""
+
+    def __init__(self, logger=None, level=logging.INFO):
+        self.logger = logger or logging.getLogger(__name__)
+        self.level = level
+
+    def record(self, trace):
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(self.level, '%s %s %s %s %d bytes %.3fs %d retries', trace['method'], trace['url'],
+                            json.dumps(trace['params'], sort_keys=True, default=str), trace['status'], trace['bytes'],
+                            trace['seconds'], trace['retries'])
+
+
+class JsonLinesSink(object):
+    """Appends a JSON object per request to a file, line by line, so it can be followed while the requests are made"""
+
+    def __init__(self, file_name):
+        self.file = open(file_name, 'a', buffering=1)
+        self.lock = threading.Lock()
+
+    def record(self, trace):
+        line = json.dumps(trace, sort_keys=True, default=str) + '\n'
+
+        with self.lock:
+            self.file.write(line)
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+class HistogramSink(object):
+    """Sums up the requests per resource in memory, along with a histogram of their latencies"""
+
+    # Upper bounds of the latency buckets in seconds, the last bucket takes everything slower
+    bounds = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self):
+        self.resources = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def resource(method, url):
+        """Returns the resource a request was made for, ids are replaced so e.g. all issue reads count together"""
+        return '{0} {1}'.format(method, re.sub(r'/\d+(?=[/.]|$)', '/{id}', urlsplit(url).path))
+
+    def record(self, trace):
+        name = self.resource(trace['method'], trace['url'])
+        bucket = len([bound for bound in self.bounds if bound < trace['seconds']])
+
+        with self.lock:
+            resource = self.resources.get(name)
+
+            if resource is None:
+                resource = self.resources[name] = {
+                    'requests': 0, 'seconds': 0.0, 'bytes': 0, 'retries': 0, 'buckets': [0] * (len(self.bounds) + 1)}
+
+            resource['requests'] += 1
+            resource['seconds'] += trace['seconds']
+            resource['bytes'] += trace['bytes']
+            resource['retries'] += trace['retries']
+            resource['buckets'][bucket] += 1
+
+    def summary(self):
+        """Returns (resource, totals) pairs, the resource taking the most time first"""
+        with self.lock:
+            return sorted(((resource, dict(totals, buckets=list(totals['buckets'])))
+                           for resource, totals in self.resources.items()),
+                          key=lambda item: -item[1]['seconds'])
+
+    def report(self):
+        """Returns the summary as a table, one line per resource"""
+        lines = ['{0:<40} {1:>8} {2:>10} {3:>12} {4:>8}  {5}'.format(
+            'resource', 'requests', 'seconds', 'bytes', 'retries',
+            ' '.join('<={0:g}s'.format(bound) for bound in self.bounds) + ' >{0:g}s'.format(self.bounds[-1]))]
+
+        for resource, totals in self.summary():
+            lines.append('{0:<40} {1:>8} {2:>10.3f} {3:>12} {4:>8}  {5}'.format(
+                resource, totals['requests'], totals['seconds'], totals['bytes'], totals['retries'],
+                ' '.join(str(count) for count in totals['buckets'])))
+
+        return '\n'.join(lines)
@@ -1,7 +1,10 @@
 import sys
+import json
 from string import Formatter
-from distutils.version import LooseVersion
-from requests import __version__ as requests_version
+from datetime import date, datetime
+
+DATE_FORMAT = '%Y-%m-%d'
+DATETIME_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
 
 
 def is_string(string):
@@ -14,9 +17,63 @@ def to_string(string):
     return string.encode('utf-8') if sys.version_info[0] < 3 else string
 
 
-def json_response(json_):
-    """Requests had json as a property until 1.0.0 and as a method afterwards"""
-    return json_() if LooseVersion(requests_version) >= LooseVersion('1.0.0') else json_
+# Accelerated JSON libraries decode the bytes of a response without decoding them to a string first
+try:
+    from orjson import loads as fast_json_loads
+except ImportError:
+    try:
+        from ujson import loads as fast_json_loads
+    except ImportError:
+        fast_json_loads = None
+
+
+def json_decode(content):
+    """Decodes the bytes of a JSON response, with orjson or ujson if one is installed and the json module otherwise"""
+    if fast_json_loads is not None:
+        try:
+            return fast_json_loads(content)
+        except ValueError:
+            # E.g. bodies which aren't UTF-8, the json module detects UTF-16 and UTF-32 as well
+            pass
+
+    try:
+        return json.loads(content)
+    except TypeError:
+        # Python 3 before 3.6 decodes strings only
+        return json.loads(content.decode('utf-8'))
+
+
+def to_date(value, date_format, datetime_format):
+    """Converts a date/datetime string to the appropriate object, returns None if value isn't one"""
+    if not is_string(value):
+        return None
+
+    # Redmine's own ISO 8601 formats are recognized by their shape and
+    # parsed by slicing, which is a lot cheaper than a failed strptime
+    if date_format == DATE_FORMAT and datetime_format == DATETIME_FORMAT:
+        length = len(value)
+
+        if (length != 10 and length != 20) or value[4:5] != '-' or value[7:8] != '-':
+            return None
+
+        try:
+            if length == 10:
+                return date(int(value[0:4]), int(value[5:7]), int(value[8:10]))
+            elif value[10] == 'T' and value[13] == ':' and value[16] == ':' and value[19] == 'Z':
+                return datetime(int(value[0:4]), int(value[5:7]), int(value[8:10]),
+                                int(value[11:13]), int(value[14:16]), int(value[17:19]))
+        except ValueError:
+            pass
+
+        return None
+
+    try:
+        return datetime.strptime(value, datetime_format)
+    except ValueError:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            return None
 
 
 class MemorizeFormatter(Formatter):
@@ -1,5 +1,10 @@
 import redmine
+from redmine.cache import ResponseCache
+from redmine.scheduler import Scheduler
 import datetime
+import entrytable
+import itertools
+from concurrent.futures import ThreadPoolExecutor
 
 
 class RedmineReader:
@@ -13,7 +18,9 @@ class RedmineReader:
         'attachments': 0
     }
 
-    def __init__(self, url, user, password, project_name, verify=True):
+    def __init__(self, url, user, password, project_name, verify=True, issue_batch_size=50, concurrency=4,
+                 columnar=False, shared_redmine=None, cache=None, page_time=None, page_bytes=None, rate=None,
+                 tracer=None):
         """
         Initializes the Redmine reader and connects to the REST service
 
@@ -22,17 +29,27 @@ class RedmineReader:
         :param password:Password to access redmine with, e.g. paSSw0rd
         :param project_name:Name of the project, this can be read from the URL, e.g. https://redmine.com/projects/{project}
         :param verify:Flag indicating whether to accept non-verified SSL certificates
+        :param issue_batch_size:How many issue ids to request in a single issue_id filter
+        :param concurrency:How many requests to run against Redmine at the same time
+        :param columnar:Flag indicating whether to collect the entry meta into an EntryTable instead of dicts
+        :param shared_redmine:Redmine instance to use instead of connecting, readers of several projects can share
+                              its connection pool and caches, url, user, password and verify are ignored then
+        :param cache:Directory to cache the responses of Redmine in, unchanged ones aren't transferred again
+        :param page_time:How many seconds a page of resources should take, page sizes adapt to it when given
+        :param page_bytes:How many bytes a page of resources should have at most, page sizes adapt to it when given
+        :param rate:How many requests per second to send to Redmine at most, None for no limit
+        :param tracer:redmine.tracing.Tracer recording the timing of every request, None to trace nothing
         """
 
-        requests_config = {
-            'verify': verify
-        }
+        if shared_redmine is not None:
+            self.redmine = shared_redmine
+        else:
+            self.redmine = self.connect(url, user, password, verify, concurrency, cache=cache, page_time=page_time,
+                                        page_bytes=page_bytes, rate=rate, tracer=tracer)
 
-        self.redmine = redmine.Redmine(
-            url,
-            username=user,
-            password=password,
-            requests=requests_config)
+        self.issue_batch_size = issue_batch_size
+        self.concurrency = concurrency
+        self.columnar = columnar
 
         self.entry_meta = {}
         self.issue_meta = {}
@@ -41,6 +58,42 @@ class RedmineReader:
         self.project = self.redmine.project.get(project_name)
 
 
+    @staticmethod
+    def connect(url, user, password, verify=True, concurrency=4, pool_size=10, cache=None, page_time=None,
+                page_bytes=None, rate=None, tracer=None, max_requests=None):
+        """
+        Connects to the REST service of Redmine
+
+        :param pool_size:How many connections to keep open, enough for all readers sharing the instance
+        :param cache:Directory to cache the responses in, they are revalidated with Redmine instead of read again
+        :param page_time:How many seconds a page should take, the page size of every resource adapts to it when given
+        :param page_bytes:How many bytes a page should have at most, the page size of every resource adapts to it when given
+        :param rate:How many requests per second to send at most, failed reads are retried with backoff regardless
+        :param tracer:redmine.tracing.Tracer recording the timing of every request
+        :param max_requests:How many requests to have in flight at once over all readers sharing the instance,
+                            None for no limit besides the concurrency of each reader
+        :return: Redmine instance
+        """
+
+        requests_config = {
+            'verify': verify
+        }
+
+        return redmine.Redmine(
+            url,
+            username=user,
+            password=password,
+            requests=requests_config,
+            concurrency=concurrency,
+            pool_size=pool_size,
+            streaming=True,
+            cache=ResponseCache(cache) if cache is not None else None,
+            page_time=page_time,
+            page_bytes=page_bytes,
+            scheduler=Scheduler(rate=rate),
+            max_requests=max_requests,
+            tracer=tracer)
+
     def analyze_time_entries(self, days_backwards):
         """
         Analyzes the "time entry" resources of redmine looking for logged time
@@ -52,7 +105,7 @@ class RedmineReader:
 
         # Access time entries
         from_date = datetime.date.today() - datetime.timedelta(days=days_backwards)
-        time_entries = self.redmine.time_entry.all(project_id=self.project.id, from_date=from_date)
+        time_entries = self.redmine.time_entry.all(project_id=self.project.id, from_date=from_date).readonly()
         user_names = {}
 
         # Collect meta data on time entries, in this format:
@@ -62,47 +115,67 @@ class RedmineReader:
         #  }, ...
         #  total_hours: X,
         # }
-        entry_meta = {}
+        entry_meta = self.new_entry_meta()
 
         # This method will also return the issues referenced in the entries, this
         # will enable us not to fetch irrelevant issues in when reading issue meta
         watched_issue_ids = []
 
         for entry in time_entries:
-            user_id = entry.user.id
+            if self.add_time_entry(entry_meta, user_names, entry.user.id, entry.user.name, entry.issue.id, entry.spent_on, entry.hours):
+                watched_issue_ids += [entry.issue.id]
 
-            if user_id not in entry_meta:
-                user_names[user_id] = entry.user.name
-                entry_meta[user_id] = {
-                    'days': {}
-                }
+        return entry_meta, set(watched_issue_ids), user_names
 
-            spent_on = entry.spent_on.isoformat()
+    def new_entry_meta(self):
+        """Returns an empty entry meta, either a dict or an EntryTable"""
+        return entrytable.EntryTable() if self.columnar else {}
 
-            if spent_on not in entry_meta[user_id]['days']:
-                entry_meta[user_id]['days'][spent_on] = {
-                    'total_hours': 0,
-                    'day_of_week': entry.spent_on.weekday()
-                }
+    def add_time_entry(self, entry_meta, user_names, user_id, user_name, issue_id, spent_on, hours):
+        """
+        Adds a single time entry to the entry meta
 
-            day = entry_meta[user_id]['days'][spent_on]
+        :param spent_on: Date the time was logged for
+        :return: True if this is the first time the issue shows up on that day
+        """
 
-            if entry.issue.id not in day:
-                day[entry.issue.id] = self.default_issue.copy()
+        if isinstance(entry_meta, entrytable.EntryTable):
+            user_names.setdefault(user_id, user_name)
+            return entry_meta.add_time_entry(user_id, spent_on, issue_id, hours)
 
-                watched_issue_ids += [entry.issue.id]
+        if user_id not in entry_meta:
+            user_names[user_id] = user_name
+            entry_meta[user_id] = {
+                'days': {}
+            }
 
-            day[entry.issue.id]['hours'] += entry.hours
-            day['total_hours'] += entry.hours
+        key = spent_on.isoformat()
 
-        return entry_meta, set(watched_issue_ids), user_names
+        if key not in entry_meta[user_id]['days']:
+            entry_meta[user_id]['days'][key] = {
+                'total_hours': 0,
+                'day_of_week': spent_on.weekday()
+            }
+
+        day = entry_meta[user_id]['days'][key]
+        first_seen = issue_id not in day
+
+        if first_seen:
+            day[issue_id] = self.default_issue.copy()
+
+        day[issue_id]['hours'] += hours
+        day['total_hours'] += hours
 
-    def analyze_issues(self, entry_meta, watched_issue_ids):
+        return first_seen
+
+    def analyze_issues(self, entry_meta, watched_issue_ids, journals=None):
         """
         Analyze issues looking for updates done by users
 
         :param entry_meta: Entries analyzed earlier, necessary to know which days to ignore
         :param watched_issue_ids: Issues found while analyzing the entries, necessary to know which issues to fetch
+        :param journals: Dictionary the journals summarized by summarize_journal are collected into by issue id,
+                         e.g. to add them to the entry meta of several projects merged by merge_entry_meta
         :return: Dictionary with analyzed issue data
         """
 
@@ -116,46 +189,227 @@ class RedmineReader:
         # }
         issue_meta = {}
 
-        issues = self.redmine.issue.all(project_id=self.project.id, include='journals', sort="id:desc", status_id="*")
+        for issue in self.fetch_issues(watched_issue_ids):
+
+            issue_meta[issue.id] = self.summarize_issue(issue)
+            issue_journals = [self.summarize_journal(journal) for journal in issue.journals]
+
+            # Check that it is updated daily
+            for journal in issue_journals:
+                self.add_journal(entry_meta, issue.id, *journal)
+
+            if journals is not None:
+                journals[issue.id] = issue_journals
+
+        return issue_meta
+
+    def synchronize(self, store, days_backwards, dirty=None):
+        """
+        Incremental alternative of analyze_time_entries followed by analyze_issues, only
+        the time entries and issues updated since the last sync are read from Redmine and
+        merged into the store, the meta data is then rebuilt out of the store
+
+        Time entries deleted in Redmine are only noticed once the store is recreated.
+
+        :param store: SyncStore keeping the data between runs
+        :param days_backwards: Timedelta indicating how much time to look back, e.g. 10 days
+        :param dirty: Set the (user_id, YYYY-MM-DD) cells changed by this sync are added to, these are
+                      the cells GamificationEngine.recalculate_points has to score again
+        :return: The entry meta, the watched issues, the user names, the issue meta and the (watermark, from_date)
+                 of this sync, nothing is committed to the store, SyncStore.commit should be called with them
+                 once the points are saved, so the changes and the points they lead to are persisted together
+        """
+
+        if dirty is None:
+            dirty = set()
+
+        from_date = (datetime.date.today() - datetime.timedelta(days=days_backwards)).isoformat()
+        watermark = store.watermark(self.project.id, from_date)
+        sync_started = datetime.datetime.utcnow().strftime(self.redmine.datetime_format)
+
+        filters = {'project_id': self.project.id}
+
+        if watermark is None:
+            store.clear(self.project.id)
+        else:
+            filters['updated_on'] = '>=' + watermark
+
+        time_entries = [
+            (entry.id, entry.user.id, entry.user.name, entry.issue.id, entry.spent_on.isoformat(), entry.hours)
+            for entry in self.redmine.time_entry.all(from_date=from_date, **filters).readonly()]
+
+        # Both the day an updated entry was logged on before and the one it is logged on now changed
+        dirty.update(store.time_entry_cells(entry[0] for entry in time_entries))
+        dirty.update((entry[1], entry[4]) for entry in time_entries)
+        store.save_time_entries(self.project.id, time_entries)
+
+        entry_meta = self.new_entry_meta()
+        user_names = {}
+        watched_issue_ids = set()
+
+        for user_id, user_name, issue_id, spent_on, hours in store.time_entries(self.project.id, from_date):
+            spent_on = datetime.datetime.strptime(spent_on, '%Y-%m-%d').date()
+            self.add_time_entry(entry_meta, user_names, user_id, user_name, issue_id, spent_on, hours)
+            watched_issue_ids.add(issue_id)
+
+        previous_journals = list(store.journals(self.project.id))
+        pruned_issue_ids = store.prune(self.project.id, from_date, watched_issue_ids)
+
+        # Journals of issues which are no longer watched still counted on the days the users logged time on
+        dirty.update((journal[1], journal[2]) for journal in previous_journals if journal[0] in pruned_issue_ids)
+        dirty.update(self.issue_cells(entry_meta, pruned_issue_ids))
+
+        # Issues seen for the first time are read completely, the
+        # ones already stored only if they changed since the last sync
+        issues = self.fetch_issues(watched_issue_ids - store.issue_ids(self.project.id))
+
+        if watermark is not None:
+            updated_issues = self.redmine.issue.filter(include='journals', status_id="*", **filters).readonly()
+            issues = itertools.chain(issues, (issue for issue in updated_issues if issue.id in watched_issue_ids))
+
+        previous_issue_meta = store.issues(self.project.id)
+        saved_issue_ids = set()
 
         for issue in issues:
+            journals = [self.summarize_journal(journal) for journal in issue.journals]
+            store.save_issue(self.project.id, issue.id, self.summarize_issue(issue), journals)
+            saved_issue_ids.add(issue.id)
 
-            if issue.id not in watched_issue_ids:
-                continue
+            dirty.update((journal[0], journal[1]) for journal in journals)
 
-            # Check the all requirements are filled out
-            issue_meta[issue.id] = {
-                "has_estimate": hasattr(issue, 'estimated_hours') and issue.estimated_hours > 0,
-                "has_category": hasattr(issue, 'category') and issue.category is not None,
-                "done_ratio": hasattr(issue, 'done_ratio') and issue.done_ratio,
-                "tracker": issue.tracker.id
-            }
+        # Journals of the saved issues were replaced, the days of the old ones changed too
+        dirty.update((journal[1], journal[2]) for journal in previous_journals if journal[0] in saved_issue_ids)
 
-            # Check that it is updated daily
-            for journal in issue.journals:
-                created_on = journal.created_on.date().isoformat()
+        issue_meta = store.issues(self.project.id)
+
+        for journal in store.journals(self.project.id):
+            self.add_journal(entry_meta, *journal)
 
-                if journal.user.id in entry_meta and created_on in entry_meta[journal.user.id]['days']:
-                    day = entry_meta[journal.user.id]['days'][created_on]
+        # E.g. a done ratio change affects every day the issue was worked on
+        dirty.update(self.issue_cells(entry_meta, set(
+            issue_id for issue_id in saved_issue_ids if previous_issue_meta.get(issue_id) != issue_meta.get(issue_id))))
 
-                    if issue.id not in day:
-                        day[issue.id] = self.default_issue.copy()
+        return entry_meta, watched_issue_ids, user_names, issue_meta, (sync_started, from_date)
 
-                    day[issue.id]['updates'] += 1
+    @staticmethod
+    def merge_entry_meta(entry_metas):
+        """
+        Merges the entry meta of several projects into a single one in the nested format
 
-                    if hasattr(journal, 'notes'):
-                        day[issue.id]['comment_length'] += len(journal.notes)
+        An issue showing up in more projects, e.g. one of a subproject, is counted only once,
+        as the time entries and journals of an issue are the same from every project. The
+        journals should be added after merging, a journal counts on any day the user logged
+        time on, in whichever project.
 
-                        extra = False
-                        for word in ["http", "+","*", "please"]:
-                            if word in journal.notes.lower():
-                                extra = True
+        :param entry_metas: Entry metas, either the nested dicts or EntryTables
+        :return: Merged entry meta
+        """
 
-                        day[issue.id]['comment_extra'] += 1
+        merged = {}
 
-                    if hasattr(journal, 'details'):
-                        attachments = [attachment for attachment in journal.details if attachment['property'] == 'attachment']
-                        day[issue.id]['attachments'] += len(attachments)
+        for entry_meta in entry_metas:
+            if isinstance(entry_meta, entrytable.EntryTable):
+                entry_meta = entry_meta.to_entry_meta()
 
-        return issue_meta
+            for user_id, user in entry_meta.items():
+                days = merged.setdefault(user_id, {'days': {}})['days']
+
+                for key, day in user['days'].items():
+                    if key not in days:
+                        days[key] = dict((issue_id, issue.copy() if isinstance(issue_id, int) else issue)
+                                         for issue_id, issue in day.items())
+                        continue
+
+                    for issue_id, issue in day.items():
+                        if isinstance(issue_id, int) and issue_id not in days[key]:
+                            days[key][issue_id] = issue.copy()
+                            days[key]['total_hours'] += issue['hours']
+
+        return merged
+
+    @staticmethod
+    def issue_cells(entry_meta, issue_ids=None):
+        """
+        Returns the (user_id, YYYY-MM-DD) cells of the entry meta the issues show up in
+
+        :param issue_ids: Set of issue ids, all cells are returned if None
+        """
+
+        if isinstance(entry_meta, entrytable.EntryTable):
+            return set((entry_meta.user_ids[entry_meta.cell_user[cell]], entry_meta.days[entry_meta.cell_day[cell]])
+                       for row, cell in enumerate(entry_meta.row_cell)
+                       if issue_ids is None or entry_meta.issue_id[row] in issue_ids)
+
+        return set((user_id, key) for user_id, user in entry_meta.items() for key, day in user['days'].items()
+                   if issue_ids is None or not issue_ids.isdisjoint(day))
+
+    @staticmethod
+    def summarize_issue(issue):
+        """Checks that all requirements of the issue are filled out"""
+        return {
+            "has_estimate": hasattr(issue, 'estimated_hours') and issue.estimated_hours > 0,
+            "has_category": hasattr(issue, 'category') and issue.category is not None,
+            "done_ratio": hasattr(issue, 'done_ratio') and issue.done_ratio,
+            "tracker": issue.tracker.id
+        }
+
+    @staticmethod
+    def summarize_journal(journal):
+        """
+        Reduces a journal to the fields relevant for the points
+
+        :return: Tuple of user id, ISO date of creation, length of the notes or None, number of attachments
+        """
+
+        notes_length = len(journal.notes) if hasattr(journal, 'notes') else None
+        attachments = 0
+
+        if hasattr(journal, 'details'):
+            attachments = len([attachment for attachment in journal.details if attachment['property'] == 'attachment'])
+
+        return journal.user.id, journal.created_on.date().isoformat(), notes_length, attachments
+
+    def add_journal(self, entry_meta, issue_id, user_id, created_on, notes_length, attachments):
+        """Adds a single journal summarized by summarize_journal to the entry meta"""
+
+        if isinstance(entry_meta, entrytable.EntryTable):
+            return entry_meta.add_journal(issue_id, user_id, created_on, notes_length, attachments)
+
+        if user_id in entry_meta and created_on in entry_meta[user_id]['days']:
+            day = entry_meta[user_id]['days'][created_on]
+
+            if issue_id not in day:
+                day[issue_id] = self.default_issue.copy()
+
+            day[issue_id]['updates'] += 1
+
+            if notes_length is not None:
+                day[issue_id]['comment_length'] += notes_length
+                day[issue_id]['comment_extra'] += 1
+
+            day[issue_id]['attachments'] += attachments
+
+    def fetch_issues(self, issue_ids):
+        """
+        Fetches the given issues together with their journals, the ids are sent in
+        batches as issue_id filters and the batches are requested concurrently
+
+        :param issue_ids: Ids of the issues to fetch
+        :return: Generator of the issues found
+        """
 
+        issue_ids = sorted(issue_ids)
+        batches = [issue_ids[i:i + self.issue_batch_size] for i in range(0, len(issue_ids), self.issue_batch_size)]
+
+        def fetch(batch):
+            # Not list(), it would call len() on the streamed set first
+            return [issue for issue in self.redmine.issue.filter(
+                project_id=self.project.id,
+                issue_id=','.join(str(issue_id) for issue_id in batch),
+                include='journals',
+                status_id="*").readonly()]
+
+        with ThreadPoolExecutor(max_workers=max(1, self.concurrency)) as executor:
+            for issues in executor.map(fetch, batches):
+                for issue in issues:
+                    yield issue
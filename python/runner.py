@@ -1,44 +1,323 @@
 #!/usr/bin/env python3
 
+import os
+import sys
+import time
+import signal
+import logging
 import argparse
-import json
+import threading
+import exporter
 import gamificationengine
 import redminereader
+import syncstore
+from redmine import tracing
+from concurrent.futures import ThreadPoolExecutor
 
-# Read configuration
-parser = argparse.ArgumentParser(description='Gamification tool exporting Redmine rewards into JSON')
-parser.add_argument('--url', help='URL of the redmine instance', required=True)
-parser.add_argument('--user', help='User for authentication', required=True)
-parser.add_argument('--password', help='Password for authentication', required=True)
-parser.add_argument('--project', help='Project to be analyzed, can be determined, normally lowercase', required=True)
-parser.add_argument('--days', help='How many days to analyze, 14 would be the last two weeks', type=int, default=14)
-parser.add_argument('file', help="JSON file location")
-args = parser.parse_args()
-
-# Load data from redmine
-reader = redminereader.RedmineReader(
-    url=args.url,
-    user=args.user,
-    password=args.password,
-    project_name=args.project,
-    verify=False)
-
-# Read redmine
-entry_meta, watched_issues, user_names = reader.analyze_time_entries(days_backwards=args.days)
-issue_meta = reader.analyze_issues(entry_meta, watched_issues)
-
-# Assign points
-engine = gamificationengine.GamificationEngine()
-points = engine.calculate_points(entry_meta, issue_meta)
-
-# Prepare JSON
-output = {
-    "user_names": user_names,
-    "points": points
-}
-
-# Write result to JSON file
-file_name = args.file
-with open(file_name, "w") as file:
-    json.dump(output, file, sort_keys=True)
 
+logger = logging.getLogger(__name__)
+
+
+def parse_arguments():
+    """Reads the configuration from the command line"""
+    parser = argparse.ArgumentParser(description='Gamification tool exporting Redmine rewards into JSON')
+    parser.add_argument('--url', help='URL of the redmine instance', required=True)
+    parser.add_argument('--user', help='User for authentication', required=True)
+    parser.add_argument('--password', help='Password for authentication', required=True)
+    projects = parser.add_mutually_exclusive_group(required=True)
+    projects.add_argument('--project', help='Project to be analyzed, can be determined, normally lowercase')
+    projects.add_argument('--projects', help='Comma separated projects to be analyzed at once, a file is written for each of them next to the file of the combined leaderboard')
+    projects.add_argument('--all-projects', help='Analyze all the projects visible to the user, like --projects', action='store_true')
+    parser.add_argument('--days', help='How many days to analyze, 14 would be the last two weeks', type=int, default=14)
+    parser.add_argument('--issue-batch-size', help='How many issues to request at once by id', type=int, default=50)
+    parser.add_argument('--concurrency', help='How many requests to run against Redmine in parallel', type=int, default=4)
+    parser.add_argument('--store', help='SQLite file to keep data in between runs, only changes are read when given')
+    parser.add_argument('--numpy', help='Score all users and days at once with NumPy', action='store_true')
+    parser.add_argument('--processes', help='Score the users on this many processes, 1 scores them in this process', type=int, default=1)
+    parser.add_argument('--columnar', help='Keep the analyzed time entries in typed arrays instead of dicts', action='store_true')
+    parser.add_argument('--shards', help='Write an index to the JSON file location and the points per user and month next to it', action='store_true')
+    parser.add_argument('--binary', help='Write the compact binary format instead of JSON to the file location', action='store_true')
+    parser.add_argument('--cache', help='Directory to cache the responses of Redmine in, unchanged ones are not transferred again')
+    parser.add_argument('--page-time', help='Adapt the page sizes so a page takes about this many seconds, e.g. 1.5', type=float)
+    parser.add_argument('--page-bytes', help='Adapt the page sizes so a page has at most about this many bytes, e.g. 1000000', type=int)
+    parser.add_argument('--rate', help='Send at most this many requests per second to Redmine, e.g. 5', type=float)
+    parser.add_argument('--trace', help='Append a JSON line with the timing of every request to Redmine to this file')
+    parser.add_argument('--trace-log', help='Log a line with the timing of every request to Redmine', action='store_true')
+    parser.add_argument('--trace-summary', help='Print the requests to Redmine summed up per resource at the end', action='store_true')
+    parser.add_argument('--interval', help='Keep running and refresh the file every this many seconds, e.g. 300', type=int)
+    parser.add_argument('file', help="JSON file location")
+    args = parser.parse_args()
+
+    if args.store and not args.project:
+        parser.error('--store can only be used with a single --project')
+
+    return args
+
+
+def create_engine(args):
+    """Returns the gamification engine selected by the arguments"""
+    if args.numpy:
+        import numpyengine
+        return numpyengine.NumpyGamificationEngine()
+
+    return gamificationengine.GamificationEngine()
+
+
+def refresh(args, reader, engine, store=None):
+    """
+    Reads Redmine, assigns the points and replaces the output file
+
+    :param reader: RedmineReader of the project, it can be reused between refreshes
+    :param store: SyncStore when only changes should be read, None to read everything
+    """
+
+    if store is None:
+        entry_meta, watched_issues, user_names = reader.analyze_time_entries(days_backwards=args.days)
+        issue_meta = reader.analyze_issues(entry_meta, watched_issues)
+        publish(args, args.file, user_names, score(args, engine, entry_meta, issue_meta))
+        return
+
+    # Read redmine
+    dirty = set()
+
+    try:
+        entry_meta, watched_issues, user_names, issue_meta, sync_state = reader.synchronize(
+            store, days_backwards=args.days, dirty=dirty)
+
+        # Only the days changed since the last run are scored when the previous points are stored
+        previous_points = store.points(reader.project.id)
+
+        if previous_points is not None:
+            points = engine.recalculate_points(previous_points, entry_meta, issue_meta, dirty)
+        elif args.processes > 1:
+            points = engine.calculate_points_parallel(entry_meta, issue_meta, processes=args.processes)
+        else:
+            points = engine.calculate_points(entry_meta, issue_meta)
+
+        # The watermark moves only together with the points, a failure before leaves both as they were
+        store.save_points(reader.project.id, points)
+        store.commit(reader.project.id, *sync_state)
+    except BaseException:
+        # A partial sync left in the open transaction would be committed by the next refresh
+        store.rollback()
+        raise
+
+    publish(args, args.file, user_names, sorted(points.items()))
+
+
+def refresh_batch(args, readers, engine):
+    """
+    Reads the projects of the readers concurrently, writes a file for each of them
+    and one with the combined leaderboard of all of them
+
+    :param readers: RedmineReaders of the projects sharing a single Redmine instance
+    """
+
+    def analyze_time_entries(reader):
+        return reader.analyze_time_entries(days_backwards=args.days)
+
+    def analyze_issues(reader, time_entries):
+        entry_meta, watched_issues, user_names = time_entries
+        journals = {}
+        issue_meta = reader.analyze_issues(entry_meta, watched_issues, journals)
+        return journals, issue_meta
+
+    # The requests of all readers are limited to args.concurrency in flight by their shared Redmine instance
+    with ThreadPoolExecutor(max_workers=min(len(readers), args.concurrency)) as executor:
+        time_entries = list(executor.map(analyze_time_entries, readers))
+
+        # Merged before the journals are added, as they count on the days
+        # the users logged time on in any of the projects
+        all_entry_meta = redminereader.RedmineReader.merge_entry_meta(entry_meta for entry_meta, _, _ in time_entries)
+
+        issues = list(executor.map(analyze_issues, readers, time_entries))
+
+    all_user_names = {}
+    all_issue_meta = {}
+    all_journals = {}
+
+    for reader, (entry_meta, _, user_names), (journals, issue_meta) in zip(readers, time_entries, issues):
+        all_user_names.update(user_names)
+        all_issue_meta.update(issue_meta)
+        all_journals.update(journals)
+        publish(args, project_file_name(args.file, reader.project.identifier), user_names,
+                score(args, engine, entry_meta, issue_meta))
+
+    # Journals of issues shared by projects are added once
+    for issue_id, journals in all_journals.items():
+        for journal in journals:
+            readers[0].add_journal(all_entry_meta, issue_id, *journal)
+
+    publish(args, args.file, all_user_names, score(args, engine, all_entry_meta, all_issue_meta))
+
+
+def score(args, engine, entry_meta, issue_meta):
+    """Returns the (user_id, points of the user) pairs in ascending user id order, lazily if possible"""
+    if args.processes > 1:
+        return sorted(engine.calculate_points_parallel(entry_meta, issue_meta, processes=args.processes).items())
+
+    # Users are written as soon as they are scored
+    return engine.iter_points(entry_meta, issue_meta)
+
+
+def publish(args, file_name, user_names, user_points):
+    """Replaces the file with the points in the format selected by the arguments"""
+    if args.shards:
+        exporter.write_shards(file_name, user_names, user_points)
+    elif args.binary:
+        exporter.write_binary(file_name, user_names, user_points)
+    else:
+        exporter.write_json(file_name, user_names, user_points)
+
+
+def project_file_name(file_name, project):
+    """Returns the location of the file of a single project in batch mode, e.g. data-project.json for data.json"""
+    base, extension = os.path.splitext(file_name)
+    return '{0}-{1}{2}'.format(base, project, extension)
+
+
+def run_daemon(args, refresh_once):
+    """
+    Calls refresh_once every args.interval seconds until SIGTERM or Ctrl+C, the readers, their
+    connection pool and the store stay open in between, a failed refresh is logged and
+    retried on the next occasion, the previously published files are kept meanwhile
+    """
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+
+    try:
+        while not stop.is_set():
+            started = time.monotonic()
+
+            try:
+                refresh_once()
+                logger.info('Refreshed %s in %.1f seconds', args.file, time.monotonic() - started)
+            except Exception:
+                logger.exception('Refreshing %s failed', args.file)
+
+            stop.wait(max(0, args.interval - (time.monotonic() - started)))
+    except KeyboardInterrupt:
+        pass
+
+
+def create_tracer(args):
+    """
+    Returns the request tracer selected by the arguments
+
+    :return: The tracer and its histogram sink, either is None if not selected
+    """
+
+    sinks = []
+    histogram = None
+
+    if args.trace_log:
+        sinks.append(tracing.LogSink())
+    if args.trace:
+        sinks.append(tracing.JsonLinesSink(args.trace))
+    if args.trace_summary:
+        histogram = tracing.HistogramSink()
+        sinks.append(histogram)
+
+    return tracing.Tracer(*sinks) if sinks else None, histogram
+
+
+def open_readers(args, tracer=None):
+    """
+    Opens the projects to be analyzed, several projects share a single Redmine instance and are opened concurrently
+
+    :param tracer: Tracer of the requests to Redmine, see create_tracer()
+    :return: List of RedmineReaders
+    """
+
+    if args.project:
+        return [redminereader.RedmineReader(
+            url=args.url,
+            user=args.user,
+            password=args.password,
+            project_name=args.project,
+            verify=False,
+            issue_batch_size=args.issue_batch_size,
+            concurrency=args.concurrency,
+            columnar=args.columnar,
+            cache=args.cache,
+            page_time=args.page_time,
+            page_bytes=args.page_bytes,
+            rate=args.rate,
+            tracer=tracer)]
+
+    if args.all_projects:
+        project_names = None
+    else:
+        project_names = [project.strip() for project in args.projects.split(',') if project.strip()]
+
+        if not project_names:
+            sys.exit('error: --projects lists no projects')
+
+    redmine = redminereader.RedmineReader.connect(args.url, args.user, args.password, verify=False,
+                                                  concurrency=args.concurrency, pool_size=max(10, args.concurrency),
+                                                  cache=args.cache, page_time=args.page_time,
+                                                  page_bytes=args.page_bytes, rate=args.rate, tracer=tracer,
+                                                  max_requests=args.concurrency)
+
+    if project_names is None:
+        project_names = [project.identifier for project in redmine.project.all()]
+
+        if not project_names:
+            sys.exit('error: the user can see no projects')
+
+    def open_reader(project_name):
+        return redminereader.RedmineReader(
+            url=None,
+            user=None,
+            password=None,
+            project_name=project_name,
+            issue_batch_size=args.issue_batch_size,
+            concurrency=args.concurrency,
+            columnar=args.columnar,
+            shared_redmine=redmine)
+
+    with ThreadPoolExecutor(max_workers=min(len(project_names), args.concurrency)) as executor:
+        return list(executor.map(open_reader, project_names))
+
+
+def main():
+    args = parse_arguments()
+
+    if args.interval is not None or args.trace_log:
+        logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+
+    tracer, histogram, store = None, None, None
+
+    try:
+        # Load data from redmine
+        tracer, histogram = create_tracer(args)
+        readers = open_readers(args, tracer)
+        engine = create_engine(args)
+        store = syncstore.SyncStore(args.store) if args.store else None
+
+        if args.project:
+            def refresh_once():
+                refresh(args, readers[0], engine, store)
+        else:
+            def refresh_once():
+                refresh_batch(args, readers, engine)
+
+        if args.interval is None:
+            refresh_once()
+        else:
+            run_daemon(args, refresh_once)
+    finally:
+        if store is not None:
+            store.close()
+
+        if tracer is not None:
+            tracer.close()
+
+        if histogram is not None:
+            sys.stderr.write(histogram.report() + '\n')
+
+
+# Guarded, the scoring processes import this module
+if __name__ == '__main__':
+    main()
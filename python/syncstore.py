@@ -0,0 +1,212 @@
+import json
+import sqlite3
+
+
+class SyncStore:
+    """Class persisting the data read out of Redmine between runs in a local SQLite database"""
+
+    schema = """
+        CREATE TABLE IF NOT EXISTS sync_state (
+            project_id INTEGER PRIMARY KEY,
+            watermark TEXT NOT NULL,
+            from_date TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS time_entries (
+            id INTEGER PRIMARY KEY,
+            project_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            user_name TEXT,
+            issue_id INTEGER NOT NULL,
+            spent_on TEXT NOT NULL,
+            hours REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS time_entries_project ON time_entries (project_id, spent_on);
+        CREATE TABLE IF NOT EXISTS issues (
+            id INTEGER PRIMARY KEY,
+            project_id INTEGER NOT NULL,
+            has_estimate INTEGER NOT NULL,
+            has_category INTEGER NOT NULL,
+            done_ratio REAL NOT NULL,
+            tracker INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS journals (
+            issue_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            created_on TEXT NOT NULL,
+            notes_length INTEGER,
+            attachments INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS journals_issue ON journals (issue_id);
+        CREATE TABLE IF NOT EXISTS points (
+            project_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            day TEXT NOT NULL,
+            points TEXT NOT NULL,
+            PRIMARY KEY (project_id, user_id, day)
+        );
+    """
+
+    def __init__(self, file_name):
+        """
+        Opens (and creates if necessary) the store
+
+        :param file_name: Location of the SQLite database, e.g. redmine.sqlite
+        """
+
+        self.connection = sqlite3.connect(file_name)
+        self.connection.executescript(self.schema)
+
+    def watermark(self, project_id, from_date):
+        """
+        Returns the time of the last successful sync of the project
+
+        :param from_date: Start of the analyzed window, ISO date string
+        :return: ISO timestamp or None if the store doesn't cover the window and everything has to be read again
+        """
+
+        row = self.connection.execute(
+            "SELECT watermark, from_date FROM sync_state WHERE project_id = ?", (project_id,)).fetchone()
+
+        if row is None or row[1] > from_date:
+            return None
+
+        return row[0]
+
+    def clear(self, project_id):
+        """Forgets everything stored for the project"""
+        self.connection.execute(
+            "DELETE FROM journals WHERE issue_id IN (SELECT id FROM issues WHERE project_id = ?)", (project_id,))
+        self.connection.execute("DELETE FROM issues WHERE project_id = ?", (project_id,))
+        self.connection.execute("DELETE FROM time_entries WHERE project_id = ?", (project_id,))
+        self.connection.execute("DELETE FROM points WHERE project_id = ?", (project_id,))
+
+    def save_time_entries(self, project_id, entries):
+        """
+        Inserts or replaces time entries
+
+        :param entries: Iterable of (id, user_id, user_name, issue_id, spent_on, hours) tuples
+        """
+
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO time_entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+            ((entry[0], project_id) + tuple(entry[1:]) for entry in entries))
+
+    def time_entry_cells(self, entry_ids):
+        """Returns the set of (user_id, spent_on) cells the stored time entries with the given ids were logged on"""
+        entry_ids = list(entry_ids)
+        cells = set()
+
+        # SQLite limits the number of variables in a statement
+        for i in range(0, len(entry_ids), 500):
+            batch = entry_ids[i:i + 500]
+            cells.update(self.connection.execute(
+                "SELECT user_id, spent_on FROM time_entries WHERE id IN ({0})".format(','.join('?' * len(batch))),
+                batch))
+
+        return cells
+
+    def time_entries(self, project_id, from_date):
+        """Returns (user_id, user_name, issue_id, spent_on, hours) tuples logged since from_date"""
+        return self.connection.execute(
+            "SELECT user_id, user_name, issue_id, spent_on, hours FROM time_entries "
+            "WHERE project_id = ? AND spent_on >= ? ORDER BY id", (project_id, from_date))
+
+    def save_issue(self, project_id, issue_id, summary, journals):
+        """
+        Inserts or replaces an issue along with all of its journals
+
+        :param summary: Issue meta as returned by RedmineReader.summarize_issue
+        :param journals: Iterable of tuples as returned by RedmineReader.summarize_journal
+        """
+
+        self.connection.execute(
+            "INSERT OR REPLACE INTO issues VALUES (?, ?, ?, ?, ?, ?)",
+            (issue_id, project_id, summary['has_estimate'], summary['has_category'],
+             summary['done_ratio'] or 0, summary['tracker']))
+        self.connection.execute("DELETE FROM journals WHERE issue_id = ?", (issue_id,))
+        self.connection.executemany(
+            "INSERT INTO journals VALUES (?, ?, ?, ?, ?)",
+            ((issue_id,) + tuple(journal) for journal in journals))
+
+    def issue_ids(self, project_id):
+        """Returns the set of issue ids stored for the project"""
+        return set(row[0] for row in self.connection.execute(
+            "SELECT id FROM issues WHERE project_id = ?", (project_id,)))
+
+    def issues(self, project_id):
+        """Returns issue meta of the stored issues of the project"""
+        return {
+            row[0]: {
+                "has_estimate": bool(row[1]),
+                "has_category": bool(row[2]),
+                "done_ratio": row[3],
+                "tracker": row[4]
+            } for row in self.connection.execute(
+                "SELECT id, has_estimate, has_category, done_ratio, tracker FROM issues WHERE project_id = ?",
+                (project_id,))
+        }
+
+    def journals(self, project_id):
+        """Returns (issue_id, user_id, created_on, notes_length, attachments) tuples of the stored issues"""
+        return self.connection.execute(
+            "SELECT journals.issue_id, journals.user_id, journals.created_on, journals.notes_length, "
+            "journals.attachments FROM journals JOIN issues ON issues.id = journals.issue_id "
+            "WHERE issues.project_id = ?", (project_id,))
+
+    def prune(self, project_id, from_date, watched_issue_ids):
+        """
+        Forgets time entries logged before from_date and issues which are no longer watched
+
+        :return: Set of the ids of the forgotten issues
+        """
+        self.connection.execute(
+            "DELETE FROM time_entries WHERE project_id = ? AND spent_on < ?", (project_id, from_date))
+
+        pruned_issue_ids = self.issue_ids(project_id) - set(watched_issue_ids)
+
+        for issue_id in pruned_issue_ids:
+            self.connection.execute("DELETE FROM journals WHERE issue_id = ?", (issue_id,))
+            self.connection.execute("DELETE FROM issues WHERE id = ?", (issue_id,))
+
+        return pruned_issue_ids
+
+    def points(self, project_id):
+        """Returns the points saved by save_points or None if there aren't any"""
+        points = {}
+
+        for user_id, day, cell in self.connection.execute(
+                "SELECT user_id, day, points FROM points WHERE project_id = ?", (project_id,)):
+            cell = json.loads(cell)
+
+            # Points saved while the reasons were lists of texts aren't reused
+            if any(isinstance(point['reasons'], list) for point in cell.values()):
+                return None
+
+            points.setdefault(user_id, {})[day] = cell
+
+        return points or None
+
+    def save_points(self, project_id, points):
+        """Replaces the points of the project, they are the base of the next incremental scoring, see commit()"""
+        self.connection.execute("DELETE FROM points WHERE project_id = ?", (project_id,))
+        self.connection.executemany(
+            "INSERT INTO points VALUES (?, ?, ?, ?)",
+            ((project_id, user_id, day, json.dumps(cell))
+             for user_id, days in points.items() for day, cell in days.items()))
+
+    def commit(self, project_id, watermark, from_date):
+        """
+        Records a successful sync of the project and persists everything saved since the last commit,
+        the synced data, the points scored out of it and the watermark are persisted in one transaction
+        """
+        self.connection.execute(
+            "INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?)", (project_id, watermark, from_date))
+        self.connection.commit()
+
+    def rollback(self):
+        """Forgets everything saved since the last commit, e.g. after a failed refresh"""
+        self.connection.rollback()
+
+    def close(self):
+        """Closes the underlying database"""
+        self.connection.close()
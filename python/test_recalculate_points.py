@@ -0,0 +1,150 @@
+import datetime
+import pytest
+import redminereader
+import syncstore
+import gamificationengine
+from types import SimpleNamespace
+
+# Resources changed by the second sync are updated long after its watermark, the rest long before
+BEFORE, AFTER = '2000-01-01T00:00:00Z', '2999-01-01T00:00:00Z'
+
+
+class FakeResourceSet(object):
+    """Stands in for a streamed ReadonlyResourceSet"""
+
+    def __init__(self, resources):
+        self.resources = resources
+
+    def readonly(self):
+        return self
+
+    def __iter__(self):
+        return iter(self.resources)
+
+
+class FakeRedmine(object):
+    """Serves time entries and issues the way Redmine filters them for RedmineReader.synchronize"""
+
+    datetime_format = '%Y-%m-%dT%H:%M:%SZ'
+
+    def __init__(self, time_entries, issues):
+        self.time_entries = time_entries
+        self.issues = issues
+        self.project = SimpleNamespace(get=lambda name: SimpleNamespace(id=1, identifier=name))
+        self.time_entry = SimpleNamespace(all=self.filter_time_entries)
+        self.issue = SimpleNamespace(filter=self.filter_issues)
+
+    @staticmethod
+    def updated(resource, updated_on):
+        return updated_on is None or resource.updated_on >= updated_on.lstrip('>=')
+
+    def filter_time_entries(self, from_date, project_id, updated_on=None):
+        return FakeResourceSet([entry for entry in self.time_entries
+                                if entry.spent_on.isoformat() >= from_date and self.updated(entry, updated_on)])
+
+    def filter_issues(self, include, status_id, project_id, issue_id=None, updated_on=None):
+        issue_ids = None if issue_id is None else set(int(issue_id) for issue_id in issue_id.split(','))
+        return FakeResourceSet([issue for issue in self.issues
+                                if (issue_ids is None or issue.id in issue_ids) and self.updated(issue, updated_on)])
+
+
+def weekdays_back(count):
+    """Returns the latest count weekdays before today, the latest first"""
+    days = []
+    day = datetime.date.today()
+
+    while len(days) < count:
+        day -= datetime.timedelta(days=1)
+
+        if day.weekday() < 5:
+            days.append(day)
+
+    return days
+
+
+def time_entry(entry_id, user_id, issue_id, spent_on, hours, updated_on=BEFORE):
+    return SimpleNamespace(id=entry_id, user=SimpleNamespace(id=user_id, name='User {0}'.format(user_id)),
+                           issue=SimpleNamespace(id=issue_id), spent_on=spent_on, hours=hours, updated_on=updated_on)
+
+
+def issue(issue_id, done_ratio, journals=(), updated_on=BEFORE):
+    return SimpleNamespace(id=issue_id, tracker=SimpleNamespace(id=1), done_ratio=done_ratio, estimated_hours=2.0,
+                           journals=list(journals), updated_on=updated_on)
+
+
+def journal(user_id, day, notes=None):
+    created_on = datetime.datetime.combine(day, datetime.time(10))
+
+    if notes is None:
+        return SimpleNamespace(user=SimpleNamespace(id=user_id), created_on=created_on, details=[])
+
+    return SimpleNamespace(user=SimpleNamespace(id=user_id), created_on=created_on, notes=notes, details=[])
+
+
+def engines():
+    yield gamificationengine.GamificationEngine()
+
+    try:
+        import numpyengine
+    except ImportError:
+        return
+
+    yield numpyengine.NumpyGamificationEngine()
+
+
+@pytest.mark.parametrize('engine', list(engines()), ids=lambda engine: engine.__class__.__name__)
+@pytest.mark.parametrize('columnar', [False, True], ids=['dicts', 'table'])
+def test_recalculated_points_equal_calculated_points_after_a_sync(tmp_path, engine, columnar):
+    day = dict(enumerate(reversed(weekdays_back(9)), 1))
+
+    # Each change of the second sync below is the only one touching its cell,
+    # so a cell missing from dirty shows up as a difference in the points
+    time_entries = [
+        time_entry(1, 1, 10, day[1], 4.0),
+        time_entry(2, 1, 11, day[1], 2.0),
+        time_entry(3, 2, 10, day[2], 9.0),
+        time_entry(4, 2, 12, day[3], 1.0),
+        time_entry(5, 1, 13, day[4], 3.5),
+        time_entry(6, 1, 13, day[5], 2.0),
+        time_entry(7, 2, 13, day[5], 1.0),
+        time_entry(8, 2, 15, day[7], 1.0),
+        time_entry(9, 2, 13, day[9], 2.0),
+    ]
+    issues = [
+        issue(10, 0),
+        issue(11, 0),
+        issue(12, 50, [journal(2, day[3], 'Done')]),
+        issue(13, 0),
+        issue(15, 0, [journal(1, day[4], 'Looked into *it*')]),
+    ]
+
+    redmine = FakeRedmine(time_entries, issues)
+    reader = redminereader.RedmineReader(None, None, None, 'project', shared_redmine=redmine, columnar=columnar)
+    store = syncstore.SyncStore(str(tmp_path / 'store.sqlite'))
+
+    entry_meta, _, _, issue_meta, sync_state = reader.synchronize(store, days_backwards=30)
+    store.save_points(1, engine.calculate_points(entry_meta, issue_meta))
+    store.commit(1, *sync_state)
+
+    # The done ratio of an issue changes, which counts on day 1
+    issues[0] = issue(10, 30, updated_on=AFTER)
+    # A journal is gone from day 3
+    issues[2] = issue(12, 50, updated_on=AFTER)
+    # An entry moves from day 5 to day 6
+    time_entries[5] = time_entry(6, 1, 13, day[6], 2.0, updated_on=AFTER)
+    # An entry moves to another issue, the journal of the issue it leaves no longer counts on day 4
+    time_entries[7] = time_entry(8, 2, 13, day[7], 1.0, updated_on=AFTER)
+    # Day 8 starts to count
+    time_entries.append(time_entry(10, 2, 11, day[8], 5.0, updated_on=AFTER))
+    # A new journal counts on day 9
+    issues[3] = issue(13, 0, [journal(2, day[9], 'Notes')], updated_on=AFTER)
+
+    dirty = set()
+    entry_meta, _, _, issue_meta, sync_state = reader.synchronize(store, days_backwards=30, dirty=dirty)
+    previous_points = store.points(1)
+    points = engine.recalculate_points(previous_points, entry_meta, issue_meta, dirty)
+
+    assert points == engine.calculate_points(entry_meta, issue_meta)
+
+    for user_id, number in ((1, 1), (2, 3), (1, 4), (1, 5), (2, 9)):
+        assert points[user_id][day[number].isoformat()] != previous_points[user_id][day[number].isoformat()]